@@ -0,0 +1,60 @@
+"""Run many headless evacuations of a layout in parallel, one process per run.
+
+Usage: python src/batch.py DenseCorridor_layout.json --runs 32 --workers 8
+
+Every run is independent (only its seed differs), so the runs are spread over
+a process pool and the per-run counts are printed along with their means.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from run import add_run_arguments
+from simulation_core import HAVE_NUMBA, load_layout, run_simulation
+
+STAT_KEYS = ("ticks", "inside", "exited", "injured", "fatal", "casualties")
+
+def _init_worker():
+    # The pool already uses every core, so each worker runs its kernels single-threaded
+    if HAVE_NUMBA:
+        from numba import set_num_threads
+        set_num_threads(1)
+
+def _run(job):
+    layout, seed, max_ticks, panic = job
+    grid, agents, exits, _ = layout
+    return seed, run_simulation(grid, agents, exits, seed=seed, max_ticks=max_ticks, panic=panic)
+
+def run_batch(filename, seeds, max_ticks=10000, panic=5, workers=None):
+    """Run filename's layout once per seed in a process pool; return [(seed, stats)] in seed order."""
+    layout = load_layout(filename)
+    jobs = [(layout, seed, max_ticks, panic) for seed in seeds]
+    # spawn rather than fork: the parent may already have started Numba's thread pool
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        return list(pool.map(_run, jobs))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless evacuations of a layout in parallel.")
+    parser.add_argument("layout", help="layout file name in data/layouts, e.g. DenseCorridor_layout.json")
+    parser.add_argument("--runs", type=int, default=16, help="number of runs (default 16)")
+    add_run_arguments(parser, seed_help="seed of the first run, the rest count up")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    seeds = range(args.seed, args.seed + args.runs)
+    results = run_batch(args.layout, seeds, args.max_ticks, args.panic, args.workers)
+
+    print("seed    " + "".join(f"{key:>12}" for key in STAT_KEYS))
+    for seed, stats in results:
+        print(f"{seed:<8}" + "".join(f"{stats[key]:>12}" for key in STAT_KEYS))
+    means = [sum(stats[key] for _, stats in results) / len(results) for key in STAT_KEYS]
+    print("mean    " + "".join(f"{mean:>12.1f}" for mean in means))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Start the evacuation simulator, or run one layout without a display.
+
+Usage: python src/run.py
+       python src/run.py --headless DenseCorridor_layout.json --seed 42
+
+--headless imports only simulation_core (which needs numpy), never pygame.
+"""
+import argparse
+
+def add_run_arguments(parser, seed_help="random seed of the run"):
+    """Add the per-run options shared by run.py --headless and batch.py to parser."""
+    parser.add_argument("--seed", type=int, default=42, help=f"{seed_help} (default 42)")
+    parser.add_argument("--max-ticks", type=int, default=10000, help="stop a run after this many ticks (default 10000)")
+    parser.add_argument("--panic", type=int, default=5, help="panic level of every agent, 0-10 (default 5)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the evacuation simulator.")
+    parser.add_argument("layout", nargs="?", help="layout file name in data/layouts, e.g. DenseCorridor_layout.json (--headless only)")
+    parser.add_argument("--headless", action="store_true", help="run the layout once without a display and print its counts")
+    add_run_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.headless:
+        if args.layout is not None:
+            parser.error("a layout is only taken with --headless; load layouts in the window with L")
+        from simulation import main as run_window
+        run_window()
+        return
+
+    if args.layout is None:
+        parser.error("--headless needs a layout")
+    from simulation_core import load_layout, run_simulation
+    grid, agents, exits, _ = load_layout(args.layout)
+    stats = run_simulation(grid, agents, exits, seed=args.seed, max_ticks=args.max_ticks, panic=args.panic)
+    print("   ".join(f"{key.capitalize()}: {value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
 import pygame
 import sys
-from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import random
 import numpy as np
-import json
-import os
 import time
 
+# The simulation itself lives in simulation_core so headless runs never import pygame
+from simulation_core import (
+    AMBIENT_TEMP, EMPTY, EXIT, FIRE, FIRE_TEMP, GRID_DTYPE, HAVE_NUMBA, HEALTHY,
+    HEAT_LUT_MAX_TEMP, NO_HEAT_LIMIT, SMOKE, SMOKE_THRESHOLD, TEMP_DTYPE, WALL,
+    add_agent, advance_tick, agent_positions, cells_of_type, compact_agents,
+    compute_distance_map, find_agent, get_heat_thresholds, in_bounds, load_layout,
+    make_agent_arrays, remove_agent, save_layout, seed_step_rng, update_distance_map,
+)
+from simulation_core import spread_fire_and_smoke  # noqa: F401 (the notebook imports it from here)
+
 # --- Config ---
 CELL_SIZE = 20
 FPS = 10
@@ -21,107 +29,14 @@ ORANGE = (255, 165, 0)
 RED = (255, 0, 0)
 PURPLE = (128, 0, 128)
 
-# Cell types
-EMPTY, WALL, EXIT, FIRE, SMOKE = 0, 1, 2, 3, 4
+# Agent colors, indexed by health state
+AGENT_COLORS = (BLUE, ORANGE, RED, PURPLE)
 
 # Placement modes
 MODE_WALL, MODE_AGENT, MODE_EXIT, MODE_FIRE = 1, 2, 3, 4
 
-# Agent health states
-HEALTHY, INJURED, FATALLY_INJURED, INCAPACITATED = 0, 1, 2, 3
-
-# Fire config
-FIRE_SPREAD_DELAY = 70    # fire spreads every X ticks
-SMOKE_SPREAD_DELAY = 18    # smoke spreads every X ticks
-EXIT_CAPACITY_PER_TICK = 1  # max agents that can go through each exit cell per tick
-
-# Temperature config
-AMBIENT_TEMP = 20.0
-FIRE_TEMP = 600.0
-THERMAL_DIFFUSIVITY = 1
-WALL_INSULATION = 0.3
-SAFE_TEMP_THRESHOLD = 50.0
-
-# Assumptions for exposure thresholds:
-# Fire and smoke are fully developed instantly for simplicity
-# Model does not include modelling the build up of fire or smoke 
-# Injury occurs at ~33% the time required to incapacitate 
-# Fatal injury occurs at ~67% of the time required to incapacitate
-
-# Heat exposure thresholds based on ISO 13571
-# Each tuple: (Temperature_C, non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
-# Conversion: 12 ticks = 1 simulation minute (10 ticks/sec real-time, 5 sec/tick sim-time)
-# 
-# Based on ISO Equation (10) for convective heat: t_Iconv = (5 × 10^7) × T^(-3.4) minutes
-# This calculates time until occupant cannot take effective action to escape (incapacitation)
-# 
-# Injury progression model:
-# - Non-fatal injury (~33% of incapacitation time): Burns developing, painful but mobile
-# - Fatal injury (~67% of incapacitation time): Severe burns that will cause death later, but adrenaline allows continued movement
-# - Incapacitation (100% of ISO time): Pain/thermal damage so extreme the agent collapses and cannot move
-# 
-# Thresholds assume dry air (<10% water vapor) for simplicity; steam causes faster injury at lower temperatures and would drastically reduce injury and incapacitation times 
-#
-HEAT_THRESHOLDS = [
-    (50, 240, 480, 720),      # 60 min incap
-    (60, 120, 240, 360),      # 30 min incap
-    (70, 68, 136, 204),       # 17 min incap
-    (80, 40, 80, 120),        # 10 min incap
-    (90, 26, 52, 78),         # 6.5 min incap
-    (100, 16, 32, 48),        # 4 min incap
-    (110, 11, 22, 32),        # 2.7 min incap
-    (120, 8, 16, 24),         # 2 min incap
-    (130, 5, 10, 16),         # 1.3 min incap
-    (140, 4, 8, 12),          # 1 min incap
-    (150, 3, 7, 10),          # 50 sec incap
-    (160, 3, 5, 8),           # 40 sec incap
-    (170, 2, 4, 7),           # 32 sec incap
-    (180, 2, 3, 5),           # 24 sec incap
-    (200, 1, 2, 3),           # 15 sec incap
-    (250, 1, 1, 1),           # 6 sec incap
-]
-
-# Smoke thresholds: (non_fatal_ticks, fatal_ticks, incapacitation_ticks)
-# Smoke/toxic gas thresholds for fully developed building fire
-# Based on ISO 13571 FED (Fractional Effective Dose) model for asphyxiant gases
-# 
-# Assumes post-flashover fire conditions with high CO (8,000 ppm), CO₂ (8%), and HCN (150 ppm)
-# CO₂ causes hyperventilation, dramatically increasing toxin uptake
-# 
-# ISO calculation: FED accumulates at 4.51 per minute in these conditions
-# - Theoretical incapacitation: ~13 seconds (2.6 ticks)
-# - Adjusted for variable exposure, agent movement, and uncertainty
-# - Values represent continuous exposure to dense smoke in fully developed fire
-#
-# (non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
-SMOKE_THRESHOLD = (2, 3, 4)
-
-# Direct fire exposure (flames/fire tiles at 600°C)
-# Agent is standing directly on a fire tile (600°C convective heat + radiant heat from flames)
-# 
-# Based on ISO 13571:
-# Equation (10) for unclothed/lightly clothed: t_Iconv = (5 × 10^7) × T^(-3.4) minutes
-# At 600°C: t = (5 × 10^7) × (600)^(-3.4) = 0.000015 minutes = 0.0009 seconds
-# 
-# Additionally:
-# - ISO notes 120°C causes "considerable pain and burns within minutes"
-# - 600°C is 5× higher than this threshold
-# - Direct flame contact also adds extreme radiant heat (>10 kW/m²)
-# - Respiratory tract experiences immediate thermal burns from superheated air
-# 
-# At 600°C exposure:
-# - All three injury stages (injury/fatal/incapacitation) occur essentially instantly
-# - Severe burns develop in <1 second
-# - Pain causes immediate collapse, shock and inability to move
-# 
-# (non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
-DIRECT_FLAME_THRESHOLDS = (1, 1, 1)
-
-def get_heat_thresholds(temp):
-    for threshold_temp, nf_ticks, f_ticks, inc_ticks in HEAT_THRESHOLDS:
-        if temp >= threshold_temp:
-            return (nf_ticks, f_ticks, inc_ticks)
-    return (float('inf'), float('inf'), float('inf'))
+# Rendering config
+FULL_FLIP_FRACTION = 0.25  # flip the whole screen once the dirty rects cover more than this share
 
 def temp_to_color(temp):
     """Convert temperature to color gradient: white -> yellow -> orange -> red"""
@@ -150,162 +65,156 @@ def temp_to_color(temp):
 
     return (r, g, b)
 
-def save_layout(filename, grid, agents, exits, fires):
-    """Save current grid configuration to a JSON file."""
-    layout = {
-        "grid_width": len(grid[0]),
-        "grid_height": len(grid),
-        "walls": [(x, y) for y, row in enumerate(grid) for x, c in enumerate(row) if c == WALL],
-        "exits": exits,
-        "fires": fires,
-        "agents": agents
+# temp_to_color for every whole degree C, so colouring the grid is one gather
+COLOR_LUT = np.array([temp_to_color(t) for t in range(HEAT_LUT_MAX_TEMP + 1)], dtype=np.uint8)
+
+def temp_colors(temp_grid):
+    """Return an (H, W, 3) uint8 array with the display color of every cell's temperature."""
+    return COLOR_LUT[np.clip(temp_grid, 0, HEAT_LUT_MAX_TEMP).astype(np.intp)]
+
+def _smoke_over(colors):
+    """Blend (120, 120, 120) at alpha 140 over colors, as an SRCALPHA blit would."""
+    shade = colors.astype(np.int32)
+    return (shade + (((120 - shade) * 140 + 120) >> 8)).astype(np.uint8)
+
+# Display color of every cell type at every whole degree, indexed [cell type, temp].
+# Walls, exits and fire have flat colors; empty cells show their temperature and
+# smoke is blended over it.
+CELL_COLOR_LUT = np.empty((5, HEAT_LUT_MAX_TEMP + 1, 3), dtype=np.uint8)
+CELL_COLOR_LUT[EMPTY] = COLOR_LUT
+CELL_COLOR_LUT[WALL] = BLACK
+CELL_COLOR_LUT[EXIT] = GREEN
+CELL_COLOR_LUT[FIRE] = RED
+CELL_COLOR_LUT[SMOKE] = _smoke_over(COLOR_LUT)
+
+def grid_colors(grid, temp_grid):
+    """Return the (H, W, 3) uint8 image of the grid at one pixel per cell."""
+    return CELL_COLOR_LUT[grid, np.clip(temp_grid, 0, HEAT_LUT_MAX_TEMP).astype(np.intp)]
+
+_label_cache = {}
+
+def render_label(font, slot, text, color):
+    """Render text for a fixed place on screen, reusing the last surface drawn there if nothing changed."""
+    key = (text, color, font)
+    cached = _label_cache.get(slot)
+    if cached is None or cached[0] != key:
+        cached = (key, font.render(text, True, color))
+        _label_cache[slot] = cached
+    return cached[1]
+
+_tile_cache = {}
+
+def cell_tile(color, cell_size):
+    """Return a cell_size square surface filled with color, cached per (color, cell_size).
+
+    An RGBA color gives a per-pixel alpha tile. Tiles are built once per zoom
+    level instead of allocating and filling a surface for every cell drawn, and
+    are converted to the display's pixel format so blits take SDL's fast path.
+    """
+    key = (color, cell_size)
+    tile = _tile_cache.get(key)
+    if tile is None:
+        has_alpha = len(color) == 4
+        tile = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA if has_alpha else 0)
+        tile.fill(color)
+        tile = to_display_format(tile, has_alpha)
+        _tile_cache[key] = tile
+    return tile
+
+def to_display_format(surface, has_alpha=False):
+    """Convert surface to the display's pixel format, if a display mode has been set."""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if has_alpha else surface.convert()
+
+def draw_grid_lines(screen, grid_w, grid_h, cell_size):
+    """Outline every cell in GRAY, matching a 1px rect border drawn per cell."""
+    width, height = grid_w * cell_size, grid_h * cell_size
+    for x in range(grid_w):
+        left = x * cell_size
+        pygame.draw.line(screen, GRAY, (left, 0), (left, height - 1))
+        pygame.draw.line(screen, GRAY, (left + cell_size - 1, 0), (left + cell_size - 1, height - 1))
+    for y in range(grid_h):
+        top = y * cell_size
+        pygame.draw.line(screen, GRAY, (0, top), (width - 1, top))
+        pygame.draw.line(screen, GRAY, (0, top + cell_size - 1), (width - 1, top + cell_size - 1))
+
+GRID_LINES_KEY = (255, 0, 255)  # transparent color of the grid line overlay
+
+def build_zoom_assets(cell_size, grid_w, grid_h):
+    """Allocate every surface whose size depends on the zoom level or grid size.
+
+    Built on startup and whenever cell_size or the grid dimensions change, so
+    drawing a frame allocates nothing:
+      "grid_surf"   one pixel per cell, the grid colors are blitted into it
+      "layer"       screen-sized, grid_surf is scaled into it
+      "grid_lines"  screen-sized cell outlines, colorkeyed to blit over layer
+      "agent_tiles" one tile per health state, indexed like AGENT_COLORS
+    """
+    size = (grid_w * cell_size, grid_h * cell_size)
+    grid_lines = pygame.Surface(size)
+    grid_lines.fill(GRID_LINES_KEY)
+    draw_grid_lines(grid_lines, grid_w, grid_h, cell_size)
+    grid_lines.set_colorkey(GRID_LINES_KEY, pygame.RLEACCEL)
+    return {
+        "grid_surf": to_display_format(pygame.Surface((grid_w, grid_h))),
+        "layer": to_display_format(pygame.Surface(size)),
+        "grid_lines": to_display_format(grid_lines),
+        "agent_tiles": [cell_tile(color, cell_size) for color in AGENT_COLORS],
     }
 
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    layouts_dir = os.path.join(base_dir, "data", "layouts")
-    os.makedirs(layouts_dir, exist_ok=True)
-    path = os.path.join(layouts_dir, filename)
-
-    with open(path, "w") as f:
-        json.dump(layout, f, indent=2)
-    print(f"Layout saved to {path}")
-
-
-def load_layout(filename):
-    """Load a layout JSON file and return grid + lists."""
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    path = os.path.join(base_dir, "data", "layouts", filename)
-
-    with open(path) as f:
-        layout = json.load(f)
-
-    grid_width = layout["grid_width"]
-    grid_height = layout["grid_height"]
-    grid = [[EMPTY for _ in range(grid_width)] for _ in range(grid_height)]
-
-    for (x, y) in layout["walls"]:
-        grid[y][x] = WALL
-    for (x, y) in layout["fires"]:
-        grid[y][x] = FIRE
-    for (x, y) in layout["exits"]:
-        grid[y][x] = EXIT
-
-    agents = sorted([tuple(a) for a in layout["agents"]])
-    exits = [tuple(e) for e in layout["exits"]]
-    fires = [tuple(f) for f in layout["fires"]]
-
-    print(f"Loaded layout: {filename}")
-    return grid, agents, exits, fires
+def render_grid_layer(grid, temp_grid, assets):
+    """Redraw assets["layer"] with the grid colors scaled up and the cell outlines on top, and return it."""
+    layer = assets["layer"]
+    pygame.surfarray.blit_array(assets["grid_surf"], grid_colors(grid, temp_grid).swapaxes(0, 1))
+    pygame.transform.scale(assets["grid_surf"], layer.get_size(), layer)
+    layer.blit(assets["grid_lines"], (0, 0))
+    return layer
+
+def render_grid_cells(grid, temp_grid, assets, cells, cell_size):
+    """Redraw the given (x, y) cells of assets["layer"] in place and return their screen rects."""
+    layer = assets["layer"]
+    rects = []
+    for x, y in cells:
+        rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
+        color = grid_colors(grid[y:y + 1, x:x + 1], temp_grid[y:y + 1, x:x + 1])[0, 0]
+        layer.fill(color.tolist(), rect)
+        layer.blit(assets["grid_lines"], rect, rect)
+        rects.append(rect)
+    return rects
+
+def render_grid_box(grid, temp_grid, assets, box, cell_size):
+    """Redraw the (rows, cols) slice pair box of assets["layer"] in place and return its screen rect."""
+    rows, cols = box
+    x, y, w, h = cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start
+    cells = assets["grid_surf"].subsurface((x, y, w, h))
+    pygame.surfarray.blit_array(cells, grid_colors(grid[box], temp_grid[box]).swapaxes(0, 1))
+    rect = pygame.Rect(x * cell_size, y * cell_size, w * cell_size, h * cell_size)
+    pygame.transform.scale(cells, rect.size, assets["layer"].subsurface(rect))
+    assets["layer"].blit(assets["grid_lines"], rect, rect)
+    return rect
+
+def changed_cell_rects(previous, current, cell_size):
+    """Return the screen rect of every cell whose drawn agent differs between two {(x, y, health)} sets."""
+    return [pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size) for x, y, _ in previous ^ current]
 
 def make_screen(grid_w, grid_h, cell_size):
     return pygame.display.set_mode((grid_w * cell_size, grid_h * cell_size))
 
-def in_bounds(x, y, grid_w, grid_h):
-    return 0 <= x < grid_w and 0 <= y < grid_h
-
-def compute_distance_map(exits, grid, grid_width, grid_height):
-    """Return a 2D array of shortest distances from each cell to the nearest exit."""
-    INF = float("inf")
-    dist_map = [[INF for _ in range(grid_width)] for _ in range(grid_height)]
-    q = deque()
-
-    for (ex, ey) in exits:
-        dist_map[ey][ex] = 0
-        q.append((ex, ey))
-
-    while q:
-        x, y = q.popleft()
-        for dx, dy in [(1,0),(-1,0),(0,1),(0,-1)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < grid_width and 0 <= ny < grid_height:
-                if grid[ny][nx] != WALL and dist_map[ny][nx] == INF:
-                    dist_map[ny][nx] = dist_map[y][x] + 1
-                    q.append((nx, ny))
-    return dist_map
-
-def diffuse_temperature(temp_grid, grid, grid_width, grid_height):
-    """Apply heat diffusion using finite difference method."""
-    new_temp = np.copy(temp_grid)
-
-    for y in range(grid_height):
-        for x in range(grid_width):
-            if grid[y][x] == FIRE:
-                new_temp[y, x] = FIRE_TEMP
-                continue
-
-            # Radiant heat from nearby fire cells (spreads to radius 3)
-            max_radiant = AMBIENT_TEMP
-            for dy in range(-3, 4):
-                for dx in range(-3, 4):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < grid_width and 0 <= ny < grid_height:
-                        if grid[ny][nx] == FIRE:
-                            distance = max(abs(dx), abs(dy))  # Chebyshev distance
-                            radiant_temp = FIRE_TEMP * (1 - (distance / 4.0))  # Falls off with distance
-                            max_radiant = max(max_radiant, radiant_temp)
-
-            # Conductive diffusion to neighbors
-            neighbors_sum = 0
-            neighbor_count = 0
-
-            for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < grid_width and 0 <= ny < grid_height:
-                    if grid[ny][nx] == WALL:
-                        diffusion_factor = 0.05  # Much lower through walls
-                    else:
-                        diffusion_factor = 0.4   # Aggressive neighbor diffusion
-
-                    neighbors_sum += temp_grid[ny, nx] * diffusion_factor
-                    neighbor_count += diffusion_factor
-
-            if neighbor_count > 0:
-                avg_neighbor_temp = neighbors_sum / neighbor_count
-                new_temp[y, x] = temp_grid[y, x] + (avg_neighbor_temp - temp_grid[y, x]) * 0.7
-            
-            # Apply radiant heat
-            new_temp[y, x] = max(new_temp[y, x], max_radiant)
-
-            # Slow cooling
-            cooling_rate = 0.005
-            new_temp[y, x] += (AMBIENT_TEMP - new_temp[y, x]) * cooling_rate
-
-    return new_temp
-
-def spread_fire_and_smoke(grid, grid_width, grid_height, tick):
-    """Spread fire and smoke at different speeds."""
-    if tick % FIRE_SPREAD_DELAY == 0:
-        new_fire = []
-        for y in range(grid_height):
-            for x in range(grid_width):
-                if grid[y][x] == FIRE:
-                    for dx, dy in [(1,0),(-1,0),(0,1),(0,-1)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < grid_width and 0 <= ny < grid_height:
-                            if grid[ny][nx] in (EMPTY, SMOKE):
-                                new_fire.append((nx, ny))
-
-        for fx, fy in new_fire:
-            grid[fy][fx] = FIRE
-
-    if tick % SMOKE_SPREAD_DELAY == 0:
-        new_smoke = []
-        for y in range(grid_height):
-            for x in range(grid_width):
-                if grid[y][x] in (FIRE, SMOKE):
-                    for dx, dy in [(1,0),(0,1),(-1,0),(0,-1)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < grid_width and 0 <= ny < grid_height:
-                            if grid[ny][nx] == EMPTY:
-                                new_smoke.append((nx, ny))
-        for sx, sy in new_smoke:
-            grid[sy][sx] = SMOKE
-
-
 def main():
     pygame.init()
 
+    # The simulation steps on a single worker thread while this one waits out the
+    # frame; the kernels release the GIL (nogil=True). Numba's random state is per
+    # thread, so the step RNG is seeded on the worker itself.
+    if HAVE_NUMBA:
+        # TBB hangs at interpreter exit once the worker thread that launched the
+        # parallel kernels has finished, so prefer the other threading layers
+        from numba import config as numba_config
+        numba_config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+    sim_worker = ThreadPoolExecutor(max_workers=1)
     random.seed(42)
+    sim_worker.submit(seed_step_rng, 42).result()
     # Ask the user for grid size (weight and height) 
     try: 
         grid_width = int(input("Enter grid width (number of cells): "))
@@ -321,9 +230,12 @@ def main():
     clock = pygame.time.Clock()
     font = pygame.font.SysFont(None, 22)
 
-    agents = []
-    exits = []
+    agents = make_agent_arrays(grid_width * grid_height)
+    n_agents = 0
+    exits = set()  # (x, y) of every exit cell
     dist_map = None
+    dist_dirty = False  # walls or exits were edited since dist_map was computed
+    toggled_wall = None  # (x, y) when that edit was a single wall toggle
     running_sim = False
     mode = MODE_AGENT
     tick = 0
@@ -334,10 +246,6 @@ def main():
     exited_injured_count = 0
     exited_fatally_injured_count = 0
     incapacitated_count = 0
-    exposure = {}
-    agent_data = {}
-    agent_health = {}
-    heat_exposure_ticks = {}
     selected_agent = None
     show_menu = False
     fires = []
@@ -346,17 +254,47 @@ def main():
     global_agent_count = 50
     global_speed_value = 1.0
     
-    temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=float)
+    temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=TEMP_DTYPE)
+    temp_buffer = np.empty_like(temp_grid)
+    occupied = np.empty((grid_height, grid_width), dtype=bool)  # scratch grid for step_agents
+    assets = build_zoom_assets(cell_size, grid_width, grid_height)
+    grid_layer = None
+    grid_dirty = True  # grid_layer is redrawn whole after resets, loads and zoom changes
+    dirty_cells = []  # (x, y) of cells edited since the last frame, redrawn one by one
+    dirty_boxes = []  # (rows, cols) slice pairs the ticks since the last frame changed
+    drawn_agents = set()  # (x, y, health) of every agent on screen last frame
+    hud_rect = pygame.Rect(0, 0, 0, 0)
+    overlay_shown = False  # a menu covered part of the grid last frame
 
-    agent_data = {}
     selected_agent = None
     next_agent_id = 1
     show_menu = False
 
-    grid = [[EMPTY for _ in range(grid_width)] for _ in range(grid_height)]
+    grid = np.zeros((grid_height, grid_width), dtype=GRID_DTYPE)
+
+    def sim_tick():
+        nonlocal tick, temp_grid, temp_buffer
+        nonlocal exited_count, exited_injured_count, exited_fatally_injured_count, incapacitated_count
+        tick += 1
+        temp_grid, temp_buffer, (exited, injured, fatal, incapacitated), changed = advance_tick(
+            grid, temp_grid, temp_buffer, agents, n_agents, dist_map, occupied, tick)
+        # Only what a spread or the diffusion touched is redrawn
+        if changed is not None:
+            dirty_boxes.append(changed)
+        exited_count += exited
+        exited_injured_count += injured
+        exited_fatally_injured_count += fatal
+        incapacitated_count += incapacitated
+
+    pending_tick = None
 
     running = True
     while running:
+        # Each frame starts by waiting for the last tick, so events and ticks still
+        # interleave exactly as if they ran on one thread
+        if pending_tick is not None:
+            pending_tick.result()
+            pending_tick = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
@@ -373,26 +311,32 @@ def main():
                 elif event.key == pygame.K_SPACE:
                     if not running_sim:
                         random.seed(42)
+                        sim_worker.submit(seed_step_rng, 42).result()
                         tick = 0
                         exited_count = 0
                         exited_injured_count = 0
                         exited_fatally_injured_count = 0
                         incapacitated_count = 0
-                        exposure = {pos: {"smoke": 0, "fire": 0} for pos in agents}
-                        agent_health = {pos: HEALTHY for pos in agents}
-                        heat_exposure_ticks = {pos: 0 for pos in agents}
-                        exposure = {pos: {"smoke": 0, "fire": 0} for pos in agents}
+                        agents["health"][:n_agents] = HEALTHY
+                        agents["fire_exp"][:n_agents] = 0
+                        agents["smoke_exp"][:n_agents] = 0
+                        agents["heat_ticks"][:n_agents] = 0
                         if exits:
                             dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+                            dist_dirty = False
                         start_time = time.time()
                         timer_running = True
                     running_sim = not running_sim
                 elif event.key == pygame.K_r:
-                    grid = [[EMPTY for _ in range(grid_width)] for _ in range(grid_height)]
-                    temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=float)
-                    agents = []
-                    exits = []
+                    grid.fill(EMPTY)
+                    temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=TEMP_DTYPE)
+                    temp_buffer = np.empty_like(temp_grid)
+                    grid_dirty = True
+                    agents = make_agent_arrays(grid_width * grid_height)
+                    n_agents = 0
+                    exits = set()
                     dist_map = None
+                    dist_dirty = False
                     running_sim = False
                     mode = MODE_AGENT
                     tick = 0
@@ -400,10 +344,8 @@ def main():
                     exited_injured_count = 0
                     exited_fatally_injured_count = 0
                     incapacitated_count = 0
-                    exposure = {}
-                    agent_data = {}
-                    agent_health = {}
-                    heat_exposure_ticks = {}
+                    selected_agent = None
+                    show_menu = False
                     elapsed_time = 0.0
                     start_time = None
                     timer_running = False
@@ -412,45 +354,44 @@ def main():
                     show_global_menu = not show_global_menu
                 
                 elif event.key == pygame.K_s:
-                    save_layout("custom_layout.json", grid, agents, exits, 
-                                [(x, y) for y, row in enumerate(grid) for x, c in enumerate(row) if c == FIRE])
+                    save_layout("custom_layout.json", grid, agent_positions(agents, n_agents), sorted(exits),
+                                cells_of_type(grid, FIRE))
                 elif event.key == pygame.K_l:
                     try:
-                        grid, agents, exits, fires = load_layout("DenseCorridor_layout.json")
+                        grid, agent_list, exits, fires = load_layout("DenseCorridor_layout.json")
+                        exits = set(exits)
                         
                         # Update grid dimensions to match loaded layout
-                        grid_height = len(grid)
-                        grid_width = len(grid[0]) if grid else 0
+                        grid_height, grid_width = grid.shape
                         
                         # Recreate screen with new dimensions
                         screen = make_screen(grid_width, grid_height, cell_size)
                         
                         # Reinitialize temperature grid with new dimensions
-                        temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=float)
-                        for y in range(grid_height):
-                            for x in range(grid_width):
-                                if grid[y][x] == FIRE:
-                                    temp_grid[y, x] = FIRE_TEMP
+                        temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=TEMP_DTYPE)
+                        temp_buffer = np.empty_like(temp_grid)
+                        occupied = np.empty((grid_height, grid_width), dtype=bool)
+                        assets = build_zoom_assets(cell_size, grid_width, grid_height)
+                        grid_dirty = True
+                        temp_grid[grid == FIRE] = FIRE_TEMP
                         
                         running_sim = False
                         tick = 0
                         exited_count = 0
 
                         random.seed(42)
+                        sim_worker.submit(seed_step_rng, 42).result()
 
                         dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+                        dist_dirty = False
 
-                        agent_data = {}
-                        exposure = {}
+                        agents = make_agent_arrays(grid_width * grid_height)
+                        n_agents = 0
+                        selected_agent = None
+                        show_menu = False
                         next_agent_id = 1
-                        for (ax, ay) in agents:
-                            agent_data[(ax, ay)] = {
-                                "id": next_agent_id,
-                                "speed": 1.0,
-                                "age": 30,
-                                "panic": 5
-                            }
-                            exposure[(ax, ay)] = {"smoke": 0, "fire": 0}
+                        for (ax, ay) in agent_list:
+                            n_agents = add_agent(agents, n_agents, ax, ay, next_agent_id, panic=5)
                             next_agent_id += 1
                     except FileNotFoundError:
                         print("No layout found in /data/layouts/")
@@ -458,9 +399,13 @@ def main():
                 elif event.key in (pygame.K_EQUALS, pygame.K_PLUS):
                     cell_size = min(100, cell_size + 5)
                     screen = make_screen(grid_width, grid_height, cell_size)
+                    assets = build_zoom_assets(cell_size, grid_width, grid_height)
+                    grid_dirty = True
                 elif event.key == pygame.K_MINUS:
                     cell_size = max(5, cell_size - 5)
                     screen = make_screen(grid_width, grid_height, cell_size)
+                    assets = build_zoom_assets(cell_size, grid_width, grid_height)
+                    grid_dirty = True
                 
                 elif show_global_menu:
                     # Adjust panic 
@@ -477,22 +422,21 @@ def main():
 
                     # Adjust how many agents
                     elif event.key == pygame.K_x:
-                        if len(agent_data) > 0:
-                            global_agent_count = min(len(agent_data), global_agent_count + 1)
+                        live_count = int(np.count_nonzero(agents["alive"][:n_agents]))
+                        if live_count > 0:
+                            global_agent_count = min(live_count, global_agent_count + 1)
                     elif event.key == pygame.K_z:
                         global_agent_count = max(1, global_agent_count - 1)
 
                     # Apply settings
                     elif event.key == pygame.K_RETURN:
-                        for pos in agent_data:
-                            agent_data[pos]["panic"] = global_panic_value
+                        all_agents = np.flatnonzero(agents["alive"][:n_agents]).tolist()
+                        agents["panic"][all_agents] = global_panic_value
 
                         # Change speed for only a subset of agents
-                        all_agents = list(agent_data.keys())
                         random.shuffle(all_agents)
                         selected = all_agents[:global_agent_count]
-                        for pos in selected:
-                            agent_data[pos]["speed"] = global_speed_value
+                        agents["speed"][selected] = global_speed_value
 
                         print(f"Set panic {global_panic_value} for all, and speed {global_speed_value} for {global_agent_count} agents.")
                         show_global_menu = False
@@ -502,15 +446,15 @@ def main():
 
                 
                 # placeholder adjusting agents attributes
-                elif show_menu and selected_agent in agent_data:
+                elif show_menu and selected_agent is not None and agents["alive"][selected_agent]:
                     if event.key == pygame.K_UP:
-                        agent_data[selected_agent]["panic"] = min(10, agent_data[selected_agent]["panic"] + 1)
+                        agents["panic"][selected_agent] = min(10, agents["panic"][selected_agent] + 1)
                     elif event.key == pygame.K_DOWN:
-                        agent_data[selected_agent]["panic"] = max(0, agent_data[selected_agent]["panic"] - 1)
+                        agents["panic"][selected_agent] = max(0, agents["panic"][selected_agent] - 1)
                     elif event.key == pygame.K_RIGHT:
-                        agent_data[selected_agent]["speed"] += 0.1
+                        agents["speed"][selected_agent] += 0.1
                     elif event.key == pygame.K_LEFT:
-                        agent_data[selected_agent]["speed"] = max(0.1, agent_data[selected_agent]["speed"] - 0.1)
+                        agents["speed"][selected_agent] = max(0.1, agents["speed"][selected_agent] - 0.1)
                     elif event.key == pygame.K_ESCAPE:
                         show_menu = False
                         selected_agent = None
@@ -521,368 +465,118 @@ def main():
                 if not in_bounds(gx, gy, grid_width, grid_height):
                     continue
 
-                if show_menu and selected_agent:
+                if show_menu and selected_agent is not None:
                     remove_rect = pygame.Rect(10 + 40, 40 + 130, 100, 30)
                     if remove_rect.collidepoint(mx, my):
-                        if selected_agent in agents:
-                            agents.remove(selected_agent)
-                        if selected_agent in agent_data:
-                            del agent_data[selected_agent]
-                        if selected_agent in exposure:
-                            del exposure[selected_agent]
-                        if selected_agent in agent_health:
-                            del agent_health[selected_agent]
-                        if selected_agent in heat_exposure_ticks:
-                            del heat_exposure_ticks[selected_agent]
+                        n_agents = remove_agent(agents, n_agents, selected_agent)
                         selected_agent = None
                         show_menu = False
                         continue
 
-                if (gx, gy) in agents:
-                    selected_agent = (gx, gy)
+                clicked_agent = find_agent(agents, n_agents, gx, gy)
+                if clicked_agent is not None:
+                    selected_agent = clicked_agent
                     show_menu = True
                     continue
 
                 if mode == MODE_WALL:
-                    if (gx, gy) in agents:
+                    if clicked_agent is not None:
                         pass
                     else:
-                        grid[gy][gx] = EMPTY if grid[gy][gx] == WALL else WALL
+                        if grid[gy, gx] == EXIT:
+                            # Walling over an exit removes it, like toggling it off in exit mode
+                            exits.discard((gx, gy))
+                            dist_dirty = True
+                            toggled_wall = None
+                        grid[gy, gx] = EMPTY if grid[gy, gx] == WALL else WALL
+                        dirty_cells.append((gx, gy))
                         if exits:
-                            dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+                            toggled_wall = None if dist_dirty else (gx, gy)
+                            dist_dirty = True
 
                 elif mode == MODE_EXIT:
-                    if grid[gy][gx] == WALL:
+                    if grid[gy, gx] == WALL:
                         pass
                     else:
-                        if grid[gy][gx] == EXIT:
-                            grid[gy][gx] = EMPTY
-                            if (gx, gy) in exits:
-                                exits.remove((gx, gy))
+                        if grid[gy, gx] == EXIT:
+                            grid[gy, gx] = EMPTY
+                            exits.discard((gx, gy))
                         else:
-                            grid[gy][gx] = EXIT
-                            exits.append((gx, gy))
-                        dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+                            grid[gy, gx] = EXIT
+                            exits.add((gx, gy))
+                        dist_dirty = True
+                        toggled_wall = None
+                        dirty_cells.append((gx, gy))
 
                 elif mode == MODE_AGENT:
-                    if grid[gy][gx] != WALL:
-                        if (gx, gy) in agents:
-                            agents.remove((gx, gy))
-                            if (gx, gy) in agent_data:
-                                del agent_data[(gx, gy)]
-                            if (gx, gy) in exposure:
-                                del exposure[(gx, gy)]
-                            if (gx, gy) in agent_health:
-                                del agent_health[(gx, gy)]
-                            if (gx, gy) in heat_exposure_ticks:
-                                del heat_exposure_ticks[(gx, gy)]
-                        else:
-                            agents.append((gx, gy))
-                            agent_data[(gx, gy)] = {
-                                "id": next_agent_id,
-                                "speed": 1.0,
-                                "age": 30,
-                                "panic": 1,
-                                "wait_ticks": 0
-                            }
-                            exposure[(gx, gy)] = {"smoke": 0, "fire": 0}
-                            agent_health[(gx, gy)] = HEALTHY
-                            heat_exposure_ticks[(gx, gy)] = 0
-                            next_agent_id += 1
+                    # Clicks on an agent select it above, so this only places new ones
+                    if grid[gy, gx] != WALL:
+                        if n_agents == len(agents["alive"]):
+                            # Out of slots: reclaim the ones left by removed agents
+                            n_agents = compact_agents(agents, n_agents)
+                            selected_agent = None
+                            show_menu = False
+                        n_agents = add_agent(agents, n_agents, gx, gy, next_agent_id, panic=1)
+                        next_agent_id += 1
 
                 elif mode == MODE_FIRE:
-                    if grid[gy][gx] == FIRE:
-                        grid[gy][gx] = EMPTY
+                    if grid[gy, gx] == FIRE:
+                        grid[gy, gx] = EMPTY
                         temp_grid[gy, gx] = AMBIENT_TEMP
                     else:
-                        grid[gy][gx] = FIRE
+                        grid[gy, gx] = FIRE
                         temp_grid[gy, gx] = FIRE_TEMP
-
-        if running_sim:
-            tick += 1
-            spread_fire_and_smoke(grid, grid_width, grid_height, tick)
-            temp_grid = diffuse_temperature(temp_grid, grid, grid_width, grid_height)
-
-        if running_sim and dist_map is not None:
-            agents.sort()
-            occupied = set(agents)  # cells taken at start of tick
-            normal_targets = defaultdict(list) # stores the agents that want to move into each normal floor cell
-            exit_targets = defaultdict(list) # stores the agents that want to move into each exit cell 
-
-            survivors_idx = set()
-            winners_move = {}
-            removed_idx = set()
-            incapacitated_idx = set()
-
-            # Stage 0: hazard exposure & injury determination (at current positions)
-            for idx, (ax, ay) in enumerate(agents):
-                cell = grid[ay][ax]
-                temp = temp_grid[ay, ax]
-                key = (ax, ay)
-
-                if key not in exposure:
-                    exposure[key] = {"smoke": 0, "fire": 0}
-                if key not in agent_health:
-                    agent_health[key] = HEALTHY
-                if key not in heat_exposure_ticks:
-                    heat_exposure_ticks[key] = 0
-
-                # Update exposure counters for smoke and fire
-                if cell == FIRE:
-                    exposure[key]["fire"] += 1
-                    exposure[key]["smoke"] = 0
-                elif cell == SMOKE:
-                    exposure[key]["smoke"] += 1
-                    exposure[key]["fire"] = 0
-                else:
-                    exposure[key]["smoke"] = 0
-                    exposure[key]["fire"] = 0
-
-                # Track continuous heat exposure
-                if temp >= SAFE_TEMP_THRESHOLD:
-                    heat_exposure_ticks[key] += 1
-                else:
-                    heat_exposure_ticks[key] = 0
-
-                health = agent_health[key]
-
-                if health == INCAPACITATED:
-                    continue
-
-                # Check direct flame (FIRE cell)
-                if cell == FIRE:
-                    nf_flame, f_flame, inc_flame = DIRECT_FLAME_THRESHOLDS
-
-                    if exposure[key]["fire"] >= inc_flame and health != INCAPACITATED:
-                        agent_health[key] = INCAPACITATED
-                        incapacitated_idx.add(idx)
-                        continue
-                    elif exposure[key]["fire"] >= f_flame and health in (HEALTHY, INJURED):
-                        agent_health[key] = FATALLY_INJURED
-                    elif exposure[key]["fire"] >= nf_flame and health == HEALTHY:
-                        agent_health[key] = INJURED
-
-                # Check smoke
-                nf_smoke, f_smoke, inc_smoke = SMOKE_THRESHOLD
-
-                if exposure[key]["smoke"] >= inc_smoke and health != INCAPACITATED:
-                    agent_health[key] = INCAPACITATED
-                    incapacitated_idx.add(idx)
-                    continue
-                elif exposure[key]["smoke"] >= f_smoke and health in (HEALTHY, INJURED):
-                    agent_health[key] = FATALLY_INJURED
-                elif exposure[key]["smoke"] >= nf_smoke and health == HEALTHY:
-                    agent_health[key] = INJURED
-
-                # Check heat - progressive with continuous exposure tracking
-                nf_heat, f_heat, inc_heat = get_heat_thresholds(temp)
-                heat_ticks = heat_exposure_ticks[key]
-
-                if heat_ticks >= inc_heat and health != INCAPACITATED:
-                    agent_health[key] = INCAPACITATED
-                    incapacitated_idx.add(idx)
-                    continue
-                elif heat_ticks >= f_heat and health in (HEALTHY, INJURED):
-                    agent_health[key] = FATALLY_INJURED
-                elif heat_ticks >= nf_heat and health == HEALTHY:
-                    agent_health[key] = INJURED
-
-            # Stage 1: each agent declares an intended move
-            for idx, (ax, ay) in enumerate(agents):
-                if idx in incapacitated_idx:
-                    survivors_idx.add(idx)
-                    continue
-                
-
-                speed = agent_data.get((ax, ay), {}).get("speed", 1.0)
-                wait_ticks = agent_data.get((ax, ay), {}).get("wait_ticks", 0)
-
-                if wait_ticks > 0:
-                    agent_data[(ax, ay)]["wait_ticks"] = wait_ticks - 1
-                    survivors_idx.add(idx)
-                    continue
-
-                if grid[ay][ax] == EXIT:
-                    exit_pos = (ax, ay)
-                    exit_targets[exit_pos].append(idx)
-                    continue
-
-                if dist_map[ay][ax] == float("inf"):
-                    survivors_idx.add(idx)
-                    continue
-
-                cands = []
-                for dx, dy in [(1,0), (-1,0), (0,1), (0,-1)]:
-                    nx, ny = ax + dx, ay + dy
-                    if in_bounds(nx, ny, grid_width, grid_height):
-                        if grid[ny][nx] != WALL and (nx, ny) not in occupied:
-                            cands.append((nx, ny))
-
-                if not cands:
-                    survivors_idx.add(idx)
-                    continue
-
-                cands.sort(key=lambda p: dist_map[p[1]][p[0]])
-                best = cands[0]
-                cur_dist = dist_map[ay][ax]
-
-                panic_lvl = agent_data.get((ax, ay), {}).get("panic", 0)
-                panic_prob = panic_lvl / 10.0
-
-                if len(cands) > 1 and random.random() < panic_prob:
-                    move = random.choice(cands[1:])
-                else:
-                    if dist_map[best[1]][best[0]] < cur_dist:
-                        move = best
-                    else:
-                        survivors_idx.add(idx)
-                        continue
-
-                if grid[move[1]][move[0]] == EXIT:
-                    exit_targets[move].append(idx)
-                else:
-                    normal_targets[move].append(idx)
-
-            # Stage 2: resolve conflicts for normal cells (one winner per cell)
-            for target, idxs in sorted(normal_targets.items()):
-                if len(idxs) == 1:
-                    winners_move[idxs[0]] = target
-                else:
-                    random.shuffle(idxs)
-                    winners_move[idxs[0]] = target
-                    for loser in idxs[1:]:
-                        survivors_idx.add(loser)
-
-            # Stage 3: resolve exits with capacity (queueing at doors)
-            exit_cap_remaining = {e: EXIT_CAPACITY_PER_TICK for e in exits}
-            for exit_pos, idxs in sorted(exit_targets.items()):
-                random.shuffle(idxs)
-                cap = exit_cap_remaining.get(exit_pos, EXIT_CAPACITY_PER_TICK)
-                winners_to_exit = idxs[:cap]
-                removed_idx.update(winners_to_exit)
-                exited_count += len(winners_to_exit)
-                for winner_idx in winners_to_exit:
-                    health_state = agent_health.get(agents[winner_idx], HEALTHY)
-                    if health_state == INJURED:
-                        exited_injured_count += 1
-                    elif health_state == FATALLY_INJURED:
-                        exited_fatally_injured_count += 1
-                for loser in idxs[cap:]:
-                    survivors_idx.add(loser)
-
-            # Stage 4: build next agents list + carry exposure and health to new coords
-            new_agents = []
-            new_exposure = {}
-            new_agent_data = {}
-            new_agent_health = {}
-            new_heat_exposure_ticks = {}
-            for idx, pos in enumerate(agents):
-                if idx in removed_idx:
-                    if pos in exposure:
-                        del exposure[pos]
-                    if pos in agent_data:
-                        del agent_data[pos]
-                    if pos in agent_health:
-                        del agent_health[pos]
-                    if pos in heat_exposure_ticks:
-                        del heat_exposure_ticks[pos]
-                    continue
-                if idx in incapacitated_idx:
-                    if pos in exposure:
-                        del exposure[pos]
-                    if pos in agent_data:
-                        del agent_data[pos]
-                    if pos in agent_health:
-                        del agent_health[pos]
-                    if pos in heat_exposure_ticks:
-                        del heat_exposure_ticks[pos]
-                    incapacitated_count += 1
-                    continue
-
-                new_pos = winners_move[idx] if idx in winners_move else pos
-                new_agents.append(new_pos)
-                old_exp = exposure.get(pos, {"smoke": 0, "fire": 0})
-                new_exposure[new_pos] = old_exp
-                if pos in exposure and pos != new_pos:
-                    del exposure[pos]
-
-                old_data = agent_data.get(pos)
-                if old_data is not None:
-                    new_agent_data[new_pos] = old_data
-
-                    if pos != new_pos:
-                       speed = max(0.1, old_data["speed"])
-                       move_delay = max(0, int(round(1 / speed)) - 1)
-                       new_agent_data[new_pos]["wait_ticks"] = move_delay
-
-                    if pos != new_pos and pos in agent_data:
-                        del agent_data[pos]
-
-                old_health = agent_health.get(pos, HEALTHY)
-                new_agent_health[new_pos] = old_health
-                if pos in agent_health and pos != new_pos:
-                    del agent_health[pos]
-
-                old_heat_ticks = heat_exposure_ticks.get(pos, 0)
-                new_heat_exposure_ticks[new_pos] = old_heat_ticks
-                if pos in heat_exposure_ticks and pos != new_pos:
-                    del heat_exposure_ticks[pos]
-
-            agents = new_agents
-            exposure = new_exposure
-            agent_data = new_agent_data
-            agent_health = new_agent_health
-            heat_exposure_ticks = new_heat_exposure_ticks
-
-        screen.fill(WHITE)
-        for y in range(grid_height):
-            for x in range(grid_width):
-                rect = pygame.Rect(x * cell_size, y * cell_size, cell_size, cell_size)
-                cell = grid[y][x]
-
-                if cell == WALL:
-                    pygame.draw.rect(screen, BLACK, rect)
-                elif cell == EXIT:
-                    pygame.draw.rect(screen, GREEN, rect)
-                else:
-                    temp_color = temp_to_color(temp_grid[y, x])
-                    pygame.draw.rect(screen, temp_color, rect)
-
-                if cell == SMOKE:
-                    smoke_surf = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
-                    smoke_surf.fill((120, 120, 120, 140))
-                    screen.blit(smoke_surf, (x * cell_size, y * cell_size))
-
-                if cell == FIRE:
-                    pygame.draw.rect(screen, (255, 0, 0), rect)
-
-                pygame.draw.rect(screen, GRAY, rect, 1)
-
-        for (ax, ay) in agents:
-            rect = pygame.Rect(ax * cell_size, ay * cell_size, cell_size, cell_size)
-            health = agent_health.get((ax, ay), HEALTHY)
-
-            if health == HEALTHY:
-                color = BLUE
-            elif health == INJURED:
-                color = ORANGE
-            elif health == FATALLY_INJURED:
-                color = RED
-            elif health == INCAPACITATED:
-                color = PURPLE
-
-            pygame.draw.rect(screen, color, rect)
-
-        if timer_running and len(agents) == 0:
+                    dirty_cells.append((gx, gy))
+
+        # However many edits this frame's events made, the distance map is refreshed once
+        if dist_dirty:
+            if toggled_wall is not None:
+                dist_map = update_distance_map(exits, grid, grid_width, grid_height, *toggled_wall)
+            else:
+                dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+            dist_dirty = False
+            toggled_wall = None
+
+        # The grid layer is cached between frames, so a paused or settled grid costs one
+        # blit; edits and ticks only redraw (and push) the cells and boxes they touched
+        full_update = grid_dirty
+        edited_rects = []
+        if grid_dirty:
+            grid_layer = render_grid_layer(grid, temp_grid, assets)
+            grid_dirty = False
+        else:
+            if dirty_cells:
+                edited_rects = render_grid_cells(grid, temp_grid, assets, dirty_cells, cell_size)
+            for box in dirty_boxes:
+                edited_rects.append(render_grid_box(grid, temp_grid, assets, box, cell_size))
+        dirty_cells.clear()
+        dirty_boxes.clear()
+        screen.blit(grid_layer, (0, 0))
+
+        live = np.flatnonzero(agents["alive"][:n_agents])
+        agent_xs, agent_ys = agents["x"][live].tolist(), agents["y"][live].tolist()
+        agent_healths = agents["health"][live].tolist()
+        tiles = assets["agent_tiles"]
+        screen.blits(zip(
+            [tiles[health] for health in agent_healths],
+            [(ax * cell_size, ay * cell_size) for ax, ay in zip(agent_xs, agent_ys)],
+        ), doreturn=False)
+        current_agents = set(zip(agent_xs, agent_ys, agent_healths))
+        dirty_rects = changed_cell_rects(drawn_agents, current_agents, cell_size) + edited_rects
+        drawn_agents = current_agents
+
+        if timer_running and len(live) == 0:
             elapsed_time = time.time() - start_time
             timer_running = False
 
         # HUD
-        inside = len(agents)
+        inside = len(live)
         current_time = time.time() - start_time if timer_running else elapsed_time
         hud_text = f"Inside: {inside}   Exited: {exited_count}   Injured: {exited_injured_count}   Fatal: {exited_fatally_injured_count}   Casualties: {incapacitated_count}   Time: {current_time:.1f}s"
-        hud_surf = font.render(hud_text, True, BLACK)
-        screen.blit(hud_surf, (8, 8))
+        hud_surf = render_label(font, "hud", hud_text, BLACK)
+        dirty_rects.append(hud_rect)
+        hud_rect = screen.blit(hud_surf, (8, 8))
+        dirty_rects.append(hud_rect)
         
         # global panic and future to be speed menu (activate this by clicking m)
         if show_global_menu:
@@ -892,29 +586,28 @@ def main():
             pygame.draw.rect(screen, (230, 230, 230), (menu_x, menu_y, menu_w, menu_h))
             pygame.draw.rect(screen, BLACK, (menu_x, menu_y, menu_w, menu_h), 2)
 
-            title = font.render("Global Agent Settings", True, BLACK)
+            title = render_label(font, "global_title", "Global Agent Settings", BLACK)
             screen.blit(title, (menu_x + 60, menu_y + 10))
 
-            panic_text = font.render(f"Panic: {global_panic_value}", True, (0, 0, 180))
+            panic_text = render_label(font, "global_panic", f"Panic: {global_panic_value}", (0, 0, 180))
             screen.blit(panic_text, (menu_x + 25, menu_y + 45))
 
-            count_text = font.render(f"Agents to Change: {global_agent_count}", True, (0, 0, 180))
+            count_text = render_label(font, "global_count", f"Agents to Change: {global_agent_count}", (0, 0, 180))
             screen.blit(count_text, (menu_x + 25, menu_y + 70))
 
-            speed_text = font.render(f"Set Speed To: {global_speed_value:.1f}", True, (0, 0, 180))
+            speed_text = render_label(font, "global_speed", f"Set Speed To: {global_speed_value:.1f}", (0, 0, 180))
             screen.blit(speed_text, (menu_x + 25, menu_y + 95))
 
-            hint_text = font.render("z and x for number of agents,  Enter=Apply", True, BLACK)
+            hint_text = render_label(font, "global_hint", "z and x for number of agents,  Enter=Apply", BLACK)
             screen.blit(hint_text, (menu_x + 8, menu_y + 125))
 
         #agents info menu
-        if show_menu and selected_agent in agent_data:
-            data = agent_data[selected_agent]
-            ax, ay = selected_agent
+        if show_menu and selected_agent is not None and agents["alive"][selected_agent]:
+            ax, ay = agents["x"][selected_agent], agents["y"][selected_agent]
             temp_at_agent = temp_grid[ay, ax]
-            health = agent_health.get(selected_agent, HEALTHY)
-            exp = exposure.get(selected_agent, {"smoke": 0, "fire": 0})
-            heat_ticks = heat_exposure_ticks.get(selected_agent, 0)
+            health = agents["health"][selected_agent]
+            smoke_exp = agents["smoke_exp"][selected_agent]
+            heat_ticks = agents["heat_ticks"][selected_agent]
 
             nf_heat, f_heat, inc_heat = get_heat_thresholds(temp_at_agent)
 
@@ -925,30 +618,45 @@ def main():
             pygame.draw.rect(screen, BLACK, (menu_x, menu_y, 200, 170), 2)
 
             lines = [
-                f"Agent ID: {data['id']}",
-                f"Speed: {data['speed']:.1f}",
-                f"Age: {data['age']}",
-                f"Panic: {data['panic']}",
+                f"Agent ID: {agents['id'][selected_agent]}",
+                f"Speed: {agents['speed'][selected_agent]:.1f}",
+                f"Age: {agents['age'][selected_agent]}",
+                f"Panic: {agents['panic'][selected_agent]}",
                 f"Health: {health_str}",
                 f"Temp: {temp_at_agent:.1f}°C",
-                f"Heat Ticks: {heat_ticks}/{inc_heat if inc_heat != float('inf') else '∞'}",
-                f"Smoke: {exp['smoke']}/{SMOKE_THRESHOLD[2]}",
+                f"Heat Ticks: {heat_ticks}/{inc_heat if inc_heat != NO_HEAT_LIMIT else '∞'}",
+                f"Smoke: {smoke_exp}/{SMOKE_THRESHOLD[2]}",
                 "ESC = Close"
             ]
             for i, text in enumerate(lines):
-                surf = font.render(text, True, BLACK)
+                surf = render_label(font, ("agent_info", i), text, BLACK)
                 screen.blit(surf, (menu_x + 8, menu_y + 8 + i * 16))
 
             # draw remove button
             remove_rect = pygame.Rect(menu_x + 50, menu_y + 130, 100, 30)
             pygame.draw.rect(screen, (200, 50, 50), remove_rect)
             pygame.draw.rect(screen, BLACK, remove_rect, 2)
-            remove_text = font.render("Remove", True, WHITE)
+            remove_text = render_label(font, "agent_remove", "Remove", WHITE)
             screen.blit(remove_text, (remove_rect.x + 18, remove_rect.y + 5))
 
-        pygame.display.flip()
+        # Menus and grid redraws update the whole screen (including the frame a menu
+        # closes); otherwise only the agent cells that changed and the HUD are pushed
+        overlay_now = show_global_menu or (show_menu and selected_agent is not None)
+        full_update = full_update or overlay_now or overlay_shown
+        overlay_shown = overlay_now
+        dirty_area = sum(rect.width * rect.height for rect in dirty_rects)
+        if full_update or dirty_area > FULL_FLIP_FRACTION * screen.get_width() * screen.get_height():
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+
+        # The frame on screen shows the state up to the last tick; the next one
+        # is computed while the clock waits
+        if running_sim:
+            pending_tick = sim_worker.submit(sim_tick)
         clock.tick(FPS)
 
+    sim_worker.shutdown()
     pygame.quit()
     sys.exit()
 
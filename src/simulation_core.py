@@ -0,0 +1,1121 @@
+"""Evacuation simulation without a display: layouts, pathfinding, fire, smoke,
+heat and agent movement.
+
+Nothing here imports pygame, so headless runs (run.py --headless, batch.py)
+need no display; they do need numpy. simulation.py builds the pygame front end
+on top of this module and re-exports it.
+"""
+from array import array
+from collections import OrderedDict
+import hashlib
+import random
+import numpy as np
+import json
+import os
+import platform
+
+try:
+    # Numba does not run on PyPy, so skip it there (running under PyPy is untested)
+    if platform.python_implementation() == "PyPy":
+        raise ImportError("Numba is not available on PyPy")
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # Numba is optional, the NumPy versions of the kernels are used instead
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+# --- Config ---
+
+# Cell types, typed like the grid so the kernels store and compare them without casts
+GRID_DTYPE = np.uint8  # one byte per cell
+EMPTY, WALL, EXIT, FIRE, SMOKE = (GRID_DTYPE(cell) for cell in range(5))
+
+# 4-neighbourhood offsets (dx, dy) used by pathfinding, spread, diffusion and movement
+NEIGHBORS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# Lookups over 4-bit neighbour sets (bit d set = NEIGHBORS[d] is in the set), used by the movement kernel
+MASK_POPCOUNT = np.array([bin(m).count("1") for m in range(16)], dtype=np.int8)
+MASK_LOWEST_BIT = np.array([(m & -m).bit_length() - 1 for m in range(16)], dtype=np.int8)
+MASK_NTH_BIT = np.array([[([d for d in range(4) if m >> d & 1] + [-1] * 4)[k] for k in range(4)]
+                         for m in range(16)], dtype=np.int8)
+
+# Agent health states
+HEALTHY, INJURED, FATALLY_INJURED, INCAPACITATED = 0, 1, 2, 3
+
+# Fire config
+FIRE_SPREAD_DELAY = 70    # fire spreads every X ticks
+SMOKE_SPREAD_DELAY = 18    # smoke spreads every X ticks
+EXIT_CAPACITY_PER_TICK = 1  # max agents that can go through each exit cell per tick
+
+# Pathfinding config
+DIST_CACHE_SIZE = 8  # distance maps kept for recently seen wall/exit layouts
+
+# Temperature config
+AMBIENT_TEMP = 20.0
+FIRE_TEMP = 600.0
+THERMAL_DIFFUSIVITY = 1
+WALL_INSULATION = 0.3
+SAFE_TEMP_THRESHOLD = 50.0
+TEMP_DTYPE = np.float32  # ample precision for 20-600 C at half the memory of float64
+TEMP_SETTLED_EPS = 0.1  # cells within this of AMBIENT_TEMP (and not on fire) are left alone by diffusion
+
+# Assumptions for exposure thresholds:
+# Fire and smoke are fully developed instantly for simplicity
+# Model does not include modelling the build up of fire or smoke 
+# Injury occurs at ~33% the time required to incapacitate 
+# Fatal injury occurs at ~67% of the time required to incapacitate
+
+# Heat exposure thresholds based on ISO 13571
+# Each tuple: (Temperature_C, non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
+# Conversion: 12 ticks = 1 simulation minute (10 ticks/sec real-time, 5 sec/tick sim-time)
+# 
+# Based on ISO Equation (10) for convective heat: t_Iconv = (5 × 10^7) × T^(-3.4) minutes
+# This calculates time until occupant cannot take effective action to escape (incapacitation)
+# 
+# Injury progression model:
+# - Non-fatal injury (~33% of incapacitation time): Burns developing, painful but mobile
+# - Fatal injury (~67% of incapacitation time): Severe burns that will cause death later, but adrenaline allows continued movement
+# - Incapacitation (100% of ISO time): Pain/thermal damage so extreme the agent collapses and cannot move
+# 
+# Thresholds assume dry air (<10% water vapor) for simplicity; steam causes faster injury at lower temperatures and would drastically reduce injury and incapacitation times 
+#
+HEAT_THRESHOLDS = [
+    (50, 240, 480, 720),      # 60 min incap
+    (60, 120, 240, 360),      # 30 min incap
+    (70, 68, 136, 204),       # 17 min incap
+    (80, 40, 80, 120),        # 10 min incap
+    (90, 26, 52, 78),         # 6.5 min incap
+    (100, 16, 32, 48),        # 4 min incap
+    (110, 11, 22, 32),        # 2.7 min incap
+    (120, 8, 16, 24),         # 2 min incap
+    (130, 5, 10, 16),         # 1.3 min incap
+    (140, 4, 8, 12),          # 1 min incap
+    (150, 3, 7, 10),          # 50 sec incap
+    (160, 3, 5, 8),           # 40 sec incap
+    (170, 2, 4, 7),           # 32 sec incap
+    (180, 2, 3, 5),           # 24 sec incap
+    (200, 1, 2, 3),           # 15 sec incap
+    (250, 1, 1, 1),           # 6 sec incap
+]
+
+# Smoke thresholds: (non_fatal_ticks, fatal_ticks, incapacitation_ticks)
+# Smoke/toxic gas thresholds for fully developed building fire
+# Based on ISO 13571 FED (Fractional Effective Dose) model for asphyxiant gases
+# 
+# Assumes post-flashover fire conditions with high CO (8,000 ppm), CO₂ (8%), and HCN (150 ppm)
+# CO₂ causes hyperventilation, dramatically increasing toxin uptake
+# 
+# ISO calculation: FED accumulates at 4.51 per minute in these conditions
+# - Theoretical incapacitation: ~13 seconds (2.6 ticks)
+# - Adjusted for variable exposure, agent movement, and uncertainty
+# - Values represent continuous exposure to dense smoke in fully developed fire
+#
+# (non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
+SMOKE_THRESHOLD = (2, 3, 4)
+
+# Direct fire exposure (flames/fire tiles at 600°C)
+# Agent is standing directly on a fire tile (600°C convective heat + radiant heat from flames)
+# 
+# Based on ISO 13571:
+# Equation (10) for unclothed/lightly clothed: t_Iconv = (5 × 10^7) × T^(-3.4) minutes
+# At 600°C: t = (5 × 10^7) × (600)^(-3.4) = 0.000015 minutes = 0.0009 seconds
+# 
+# Additionally:
+# - ISO notes 120°C causes "considerable pain and burns within minutes"
+# - 600°C is 5× higher than this threshold
+# - Direct flame contact also adds extreme radiant heat (>10 kW/m²)
+# - Respiratory tract experiences immediate thermal burns from superheated air
+# 
+# At 600°C exposure:
+# - All three injury stages (injury/fatal/incapacitation) occur essentially instantly
+# - Severe burns develop in <1 second
+# - Pain causes immediate collapse, shock and inability to move
+# 
+# (non_fatal_injury_ticks, fatal_injury_ticks, incapacitation_ticks)
+DIRECT_FLAME_THRESHOLDS = (1, 1, 1)
+
+# The same table as lookup arrays indexed by whole degrees C, so finding the band
+# for a temperature is a single array read. Hotter rows come later in
+# HEAT_THRESHOLDS, so each row overwrites everything from its threshold upwards.
+# Temperatures below the first row never injure the agent (NO_HEAT_LIMIT).
+HEAT_LUT_MAX_TEMP = 700
+NO_HEAT_LIMIT = np.iinfo(np.int32).max
+HEAT_NF_TICKS = np.full(HEAT_LUT_MAX_TEMP + 1, NO_HEAT_LIMIT, dtype=np.int32)
+HEAT_F_TICKS = np.full(HEAT_LUT_MAX_TEMP + 1, NO_HEAT_LIMIT, dtype=np.int32)
+HEAT_INC_TICKS = np.full(HEAT_LUT_MAX_TEMP + 1, NO_HEAT_LIMIT, dtype=np.int32)
+for _threshold_temp, _nf_ticks, _f_ticks, _inc_ticks in HEAT_THRESHOLDS:
+    HEAT_NF_TICKS[_threshold_temp:] = _nf_ticks
+    HEAT_F_TICKS[_threshold_temp:] = _f_ticks
+    HEAT_INC_TICKS[_threshold_temp:] = _inc_ticks
+
+def get_heat_thresholds(temp):
+    """Return the (non-fatal, fatal, incapacitation) ticks for the hottest band temp has reached."""
+    t = int(min(HEAT_LUT_MAX_TEMP, max(0, temp)))
+    return (int(HEAT_NF_TICKS[t]), int(HEAT_F_TICKS[t]), int(HEAT_INC_TICKS[t]))
+
+def cells_of_type(grid, cell_type):
+    """Return the [x, y] coordinates of every cell of the given type, in row-major order."""
+    return np.argwhere(np.asarray(grid) == cell_type)[:, ::-1].tolist()
+
+def save_layout(filename, grid, agents, exits, fires):
+    """Save current grid configuration to a JSON file."""
+    grid = np.asarray(grid)
+    layout = {
+        "grid_width": grid.shape[1],
+        "grid_height": grid.shape[0],
+        "walls": cells_of_type(grid, WALL),
+        "exits": exits,
+        "fires": fires,
+        "agents": agents
+    }
+
+    base_dir = os.path.dirname(os.path.dirname(__file__))
+    layouts_dir = os.path.join(base_dir, "data", "layouts")
+    os.makedirs(layouts_dir, exist_ok=True)
+    path = os.path.join(layouts_dir, filename)
+
+    with open(path, "w") as f:
+        json.dump(layout, f, indent=2)
+    print(f"Layout saved to {path}")
+
+
+def load_layout(filename):
+    """Load a layout JSON file and return grid + lists."""
+    base_dir = os.path.dirname(os.path.dirname(__file__))
+    path = os.path.join(base_dir, "data", "layouts", filename)
+
+    with open(path) as f:
+        layout = json.load(f)
+
+    grid_width = layout["grid_width"]
+    grid_height = layout["grid_height"]
+    grid = np.zeros((grid_height, grid_width), dtype=GRID_DTYPE)
+
+    for (x, y) in layout["walls"]:
+        grid[y, x] = WALL
+    for (x, y) in layout["fires"]:
+        grid[y, x] = FIRE
+    for (x, y) in layout["exits"]:
+        grid[y, x] = EXIT
+
+    agents = sorted([tuple(a) for a in layout["agents"]])
+    exits = [tuple(e) for e in layout["exits"]]
+    fires = [tuple(f) for f in layout["fires"]]
+
+    print(f"Loaded layout: {filename}")
+    return grid, agents, exits, fires
+
+def in_bounds(x, y, grid_w, grid_h):
+    return 0 <= x < grid_w and 0 <= y < grid_h
+
+def distance_dtype(n_cells):
+    """Dtype of the distance map of a grid with n_cells cells.
+
+    Cells that cannot reach any exit (and walls) hold the dtype's maximum, so
+    uint16 is used while every real distance (at most n_cells - 1) stays below
+    it, and int32 for larger grids.
+    """
+    return np.uint16 if n_cells <= np.iinfo(np.uint16).max else np.int32
+
+@njit(nogil=True, cache=True)
+def _bfs(grid_flat, w, h, exits_x, exits_y, dist):
+    """Multi-source BFS over a flat grid using an int32 array as the queue.
+
+    Fills dist, which must come in filled with its dtype's maximum; that value
+    stays on cells no exit can reach. Returns dist and the BFS tree as parent
+    indices (-1 for exits and unreachable cells).
+    """
+    n = w * h
+    UNREACHABLE = np.iinfo(dist.dtype).max
+    parent = np.full(n, -1, np.int32)
+    q = np.empty(n, np.int32)
+    head = 0
+    tail = 0
+
+    # An exit walled over in the editor stays a wall, which the movement kernel
+    # relies on being UNREACHABLE
+    for i in range(exits_x.shape[0]):
+        idx = exits_y[i] * w + exits_x[i]
+        if grid_flat[idx] != WALL and dist[idx] == UNREACHABLE:
+            dist[idx] = 0
+            q[tail] = idx
+            tail += 1
+
+    while head < tail:
+        idx = q[head]
+        head += 1
+        x = idx % w
+        d = dist[idx] + 1
+
+        # East / west stay on the same row, south / north are one row apart
+        if x + 1 < w and grid_flat[idx + 1] != WALL and dist[idx + 1] == UNREACHABLE:
+            dist[idx + 1] = d
+            parent[idx + 1] = idx
+            q[tail] = idx + 1
+            tail += 1
+        if x > 0 and grid_flat[idx - 1] != WALL and dist[idx - 1] == UNREACHABLE:
+            dist[idx - 1] = d
+            parent[idx - 1] = idx
+            q[tail] = idx - 1
+            tail += 1
+        if idx + w < n and grid_flat[idx + w] != WALL and dist[idx + w] == UNREACHABLE:
+            dist[idx + w] = d
+            parent[idx + w] = idx
+            q[tail] = idx + w
+            tail += 1
+        if idx >= w and grid_flat[idx - w] != WALL and dist[idx - w] == UNREACHABLE:
+            dist[idx - w] = d
+            parent[idx - w] = idx
+            q[tail] = idx - w
+            tail += 1
+
+    return dist, parent
+
+def _bfs_python(grid_flat, w, h, exits, dist_dtype):
+    """Pure Python version of _bfs used when Numba is missing.
+
+    Works on flat y * w + x indices with array buffers for the queue,
+    distances and parents, so the inner loop never builds tuples.
+    """
+    n = w * h
+    UNREACHABLE = np.iinfo(dist_dtype).max
+    dist = array('H' if dist_dtype == np.uint16 else 'i', [UNREACHABLE]) * n
+    parent = array('i', [-1]) * n
+    q = array('i', [0]) * n
+    head = tail = 0
+    wall = int(WALL)  # grid_flat holds Python ints, which compare faster with an int
+
+    for ex, ey in exits:
+        idx = ey * w + ex
+        if grid_flat[idx] != wall and dist[idx] == UNREACHABLE:
+            dist[idx] = 0
+            q[tail] = idx
+            tail += 1
+
+    while head < tail:
+        idx = q[head]
+        head += 1
+        y, x = divmod(idx, w)
+        d = dist[idx] + 1
+        for nb, ok in ((idx + 1, x + 1 < w), (idx - 1, x > 0), (idx + w, y + 1 < h), (idx - w, y > 0)):
+            if ok and dist[nb] == UNREACHABLE and grid_flat[nb] != wall:
+                dist[nb] = d
+                parent[nb] = idx
+                q[tail] = nb
+                tail += 1
+
+    return np.array(dist, dtype=dist_dtype), np.array(parent, dtype=np.int32)
+
+@njit(nogil=True, cache=True)
+def _neighbours(idx, w, n):
+    """Flat indices of the 4-neighbours of idx, with -1 for those off the grid."""
+    x = idx % w
+    east = idx + 1 if x + 1 < w else -1
+    west = idx - 1 if x > 0 else -1
+    south = idx + w if idx + w < n else -1
+    north = idx - w if idx >= w else -1
+    return (east, west, south, north)
+
+@njit(nogil=True, cache=True)
+def _relax_from(grid_flat, w, dist, parent, q, head, tail, seeds, seed_dist, seed_parent):
+    """Shortest-path relaxation starting from queued cells plus sorted seed cells.
+
+    The FIFO queue and the seeds (sorted by distance) are merged so cells are
+    settled in non-decreasing distance order, which keeps the unit-weight BFS
+    exact when the seeds start at different distances.
+    """
+    n = dist.shape[0]
+    si = 0
+    while head < tail or si < seeds.shape[0]:
+        if head < tail and (si >= seeds.shape[0] or dist[q[head]] <= seed_dist[si]):
+            u = q[head]
+            head += 1
+        else:
+            u = seeds[si]
+            d = seed_dist[si]
+            p = seed_parent[si]
+            si += 1
+            if dist[u] <= d:
+                continue
+            dist[u] = d
+            parent[u] = p
+
+        d = dist[u] + 1
+        for v in _neighbours(u, w, n):
+            if v >= 0 and grid_flat[v] != WALL and dist[v] > d:
+                dist[v] = d
+                parent[v] = u
+                q[tail] = v
+                tail += 1
+
+@njit(nogil=True, cache=True)
+def _open_cell(grid_flat, w, dist, parent, cell):
+    """Update dist/parent in place after the wall at cell was removed."""
+    n = dist.shape[0]
+    UNREACHABLE = np.iinfo(dist.dtype).max
+    best = UNREACHABLE
+    best_nb = -1
+    for v in _neighbours(cell, w, n):
+        if v >= 0 and dist[v] < best:
+            best = dist[v]
+            best_nb = v
+    if best == UNREACHABLE:
+        return  # still cut off from every exit
+
+    dist[cell] = best + 1
+    parent[cell] = best_nb
+    q = np.empty(n, np.int32)
+    q[0] = cell
+    empty = np.empty(0, np.int32)
+    _relax_from(grid_flat, w, dist, parent, q, 0, 1, empty, empty, empty)
+
+@njit(nogil=True, cache=True)
+def _close_cell(grid_flat, w, dist, parent, cell):
+    """Update dist/parent in place after a wall was placed on cell."""
+    n = dist.shape[0]
+    UNREACHABLE = np.iinfo(dist.dtype).max
+    if dist[cell] == UNREACHABLE:
+        return  # nothing routed through an unreachable cell
+
+    # Everything below cell in the BFS tree lost its path; collect and clear it
+    subtree = np.empty(n, np.int32)
+    subtree[0] = cell
+    size = 1
+    head = 0
+    while head < size:
+        u = subtree[head]
+        head += 1
+        for v in _neighbours(u, w, n):
+            if v >= 0 and parent[v] == u:
+                subtree[size] = v
+                size += 1
+    for i in range(size):
+        dist[subtree[i]] = UNREACHABLE
+        parent[subtree[i]] = -1
+
+    # Re-seed each orphaned cell from its best surviving neighbour
+    seeds = np.empty(size, np.int32)
+    seed_dist = np.empty(size, np.int32)
+    seed_parent = np.empty(size, np.int32)
+    n_seeds = 0
+    for i in range(1, size):
+        u = subtree[i]
+        best = UNREACHABLE
+        best_nb = -1
+        for v in _neighbours(u, w, n):
+            if v >= 0 and dist[v] < best:
+                best = dist[v]
+                best_nb = v
+        if best != UNREACHABLE:
+            seeds[n_seeds] = u
+            seed_dist[n_seeds] = best + 1
+            seed_parent[n_seeds] = best_nb
+            n_seeds += 1
+
+    order = np.argsort(seed_dist[:n_seeds], kind="mergesort")
+    q = np.empty(n, np.int32)
+    _relax_from(grid_flat, w, dist, parent, q, 0, 0,
+                seeds[:n_seeds][order], seed_dist[:n_seeds][order], seed_parent[:n_seeds][order])
+
+_dist_cache = OrderedDict()
+
+def _distance_key(walls, exits):
+    """Fingerprint the parts of a layout the BFS depends on: its shape, walls and exits."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array(walls.shape, dtype=np.int32).tobytes())
+    digest.update(np.packbits(walls).tobytes())
+    digest.update(np.array(sorted(exits), dtype=np.int32).tobytes())
+    return digest.digest()
+
+def _cache_distance_map(key, dist, parent, grid_width, grid_height):
+    """Store a BFS result in the LRU cache and return the read-only 2D distance map."""
+    dist_map = dist.reshape(grid_height, grid_width)
+    dist_map.flags.writeable = False
+    _dist_cache[key] = (dist_map, parent)
+    if len(_dist_cache) > DIST_CACHE_SIZE:
+        _dist_cache.popitem(last=False)
+    return dist_map
+
+def compute_distance_map(exits, grid, grid_width, grid_height):
+    """Return a 2D array of shortest distances from each cell to the nearest exit.
+
+    Cells that cannot reach any exit (and walls) hold the maximum of the map's
+    dtype, uint16 or int32 by grid size (see distance_dtype). Results are cached per
+    wall/exit layout (LRU, DIST_CACHE_SIZE entries), so toggling a cell back
+    and forth while editing does not rerun the BFS. The returned array is
+    shared with the cache and is read-only.
+    """
+    grid_np = np.ascontiguousarray(grid, dtype=GRID_DTYPE)
+    key = _distance_key(grid_np == WALL, exits)
+    cached = _dist_cache.get(key)
+    if cached is not None:
+        _dist_cache.move_to_end(key)
+        return cached[0]
+
+    dist_dtype = distance_dtype(grid_width * grid_height)
+    if HAVE_NUMBA:
+        exits_x = np.array([ex for ex, _ in exits], dtype=np.int32)
+        exits_y = np.array([ey for _, ey in exits], dtype=np.int32)
+        dist = np.full(grid_width * grid_height, np.iinfo(dist_dtype).max, dtype=dist_dtype)
+        dist, parent = _bfs(grid_np.ravel(), grid_width, grid_height, exits_x, exits_y, dist)
+    else:
+        dist, parent = _bfs_python(grid_np.ravel().tolist(), grid_width, grid_height, exits, dist_dtype)
+    return _cache_distance_map(key, dist, parent, grid_width, grid_height)
+
+def update_distance_map(exits, grid, grid_width, grid_height, x, y):
+    """Return the distance map after the wall at (x, y) has just been toggled.
+
+    Starts from the cached map of the layout before the edit and only relaxes
+    the cells the edit can affect: a removed wall propagates shorter paths out
+    from (x, y), an added wall clears the cells whose BFS-tree path ran
+    through (x, y) and re-seeds them from their surviving neighbours. Falls
+    back to compute_distance_map when the previous layout is not cached.
+    """
+    grid_np = np.ascontiguousarray(grid, dtype=GRID_DTYPE)
+    walls = grid_np == WALL
+    key = _distance_key(walls, exits)
+    cached = _dist_cache.get(key)
+    if cached is not None:
+        _dist_cache.move_to_end(key)
+        return cached[0]
+
+    walls[y, x] = not walls[y, x]
+    previous = _dist_cache.get(_distance_key(walls, exits))
+    if previous is None or (x, y) in exits:
+        return compute_distance_map(exits, grid_np, grid_width, grid_height)
+
+    dist = previous[0].ravel().copy()
+    parent = previous[1].copy()
+    cell = y * grid_width + x
+    if grid_np[y, x] == WALL:
+        _close_cell(grid_np.ravel(), grid_width, dist, parent, cell)
+    else:
+        _open_cell(grid_np.ravel(), grid_width, dist, parent, cell)
+    return _cache_distance_map(key, dist, parent, grid_width, grid_height)
+
+def _dilate_box(mask):
+    """Grow a boolean mask by one cell in all eight directions."""
+    h, w = mask.shape
+    padded = np.pad(mask, 1)
+    grown = np.zeros_like(mask)
+    for dy in range(3):
+        for dx in range(3):
+            grown |= padded[dy:dy + h, dx:dx + w]
+    return grown
+
+def _diffuse_numpy(temp_grid, grid_np, new_temp):
+    """Vectorised heat diffusion step, writing the result into new_temp."""
+    grid_height, grid_width = grid_np.shape
+    wall_mask = grid_np == WALL
+    fire_mask = grid_np == FIRE
+
+    # Radiant heat from nearby fire cells (spreads to radius 3).
+    # Each dilation step is one ring further away in Chebyshev distance.
+    radiant = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=temp_grid.dtype)
+    reached = fire_mask
+    for distance in range(1, 4):
+        grown = _dilate_box(reached)
+        radiant[grown & ~reached] = FIRE_TEMP * (1 - (distance / 4.0))  # Falls off with distance
+        reached = grown
+
+    # Conductive diffusion to neighbors: much lower through walls, aggressive otherwise.
+    # The factor and flux grids carry a zero border so out-of-bounds neighbours
+    # contribute nothing; everything after that is updated in place.
+    padded_diff = np.zeros((grid_height + 2, grid_width + 2), dtype=temp_grid.dtype)
+    diff = padded_diff[1:-1, 1:-1]
+    diff.fill(0.4)
+    diff[wall_mask] = 0.05
+    padded_flux = np.zeros_like(padded_diff)
+    np.multiply(temp_grid, diff, out=padded_flux[1:-1, 1:-1])
+
+    neighbors_sum = np.zeros_like(temp_grid)
+    neighbor_count = np.zeros_like(temp_grid)
+    for dx, dy in NEIGHBORS:
+        rows = slice(1 + dy, 1 + dy + grid_height)
+        cols = slice(1 + dx, 1 + dx + grid_width)
+        neighbors_sum += padded_flux[rows, cols]
+        neighbor_count += padded_diff[rows, cols]
+
+    # new_temp = temp + (avg_neighbor_temp - temp) * 0.7, reusing neighbors_sum as scratch
+    has_neighbors = neighbor_count > 0
+    np.divide(neighbors_sum, neighbor_count, out=neighbors_sum, where=has_neighbors)
+    neighbors_sum -= temp_grid
+    neighbors_sum *= 0.7
+    new_temp[...] = temp_grid
+    np.add(new_temp, neighbors_sum, out=new_temp, where=has_neighbors)
+
+    # Apply radiant heat
+    np.maximum(new_temp, radiant, out=new_temp)
+
+    # Slow cooling
+    cooling_rate = 0.005
+    np.subtract(AMBIENT_TEMP, new_temp, out=neighbors_sum)
+    neighbors_sum *= cooling_rate
+    new_temp += neighbors_sum
+
+    new_temp[fire_mask] = FIRE_TEMP
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def _diffuse(temp_grid, grid_np, new_temp):
+    """Fused heat diffusion kernel: one pass per cell, no temporary arrays."""
+    grid_height, grid_width = grid_np.shape
+    for y in prange(grid_height):
+        for x in range(grid_width):
+            if grid_np[y, x] == FIRE:
+                new_temp[y, x] = FIRE_TEMP
+                continue
+
+            # Radiant heat from nearby fire cells (spreads to radius 3)
+            max_radiant = AMBIENT_TEMP
+            for dy in range(-3, 4):
+                for dx in range(-3, 4):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < grid_width and 0 <= ny < grid_height:
+                        if grid_np[ny, nx] == FIRE:
+                            distance = max(abs(dx), abs(dy))  # Chebyshev distance
+                            radiant_temp = FIRE_TEMP * (1 - (distance / 4.0))  # Falls off with distance
+                            max_radiant = max(max_radiant, radiant_temp)
+
+            # Conductive diffusion to neighbors
+            neighbors_sum = 0.0
+            neighbor_count = 0.0
+            for dx, dy in NEIGHBORS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < grid_width and 0 <= ny < grid_height:
+                    if grid_np[ny, nx] == WALL:
+                        diffusion_factor = 0.05  # Much lower through walls
+                    else:
+                        diffusion_factor = 0.4   # Aggressive neighbor diffusion
+
+                    neighbors_sum += temp_grid[ny, nx] * diffusion_factor
+                    neighbor_count += diffusion_factor
+
+            cell_temp = temp_grid[y, x]
+            if neighbor_count > 0:
+                avg_neighbor_temp = neighbors_sum / neighbor_count
+                cell_temp = cell_temp + (avg_neighbor_temp - cell_temp) * 0.7
+
+            # Apply radiant heat
+            cell_temp = max(cell_temp, max_radiant)
+
+            # Slow cooling
+            cooling_rate = 0.005
+            new_temp[y, x] = cell_temp + (AMBIENT_TEMP - cell_temp) * cooling_rate
+
+def diffusion_box(temp_grid, grid):
+    """Return the (rows, cols) slice pair of cells diffuse_temperature recomputes.
+
+    Returns None once the field has settled at ambient, when diffusion only
+    copies it.
+    """
+    grid_np = np.asarray(grid, dtype=GRID_DTYPE)
+    grid_height, grid_width = grid_np.shape
+
+    # Only fires and cells still warmer than ambient change the field. Radiant
+    # heat reaches 3 cells from a fire, so a 4 cell margin around them covers
+    # every cell that can change while its neighbours outside the box are ambient.
+    active = (grid_np == FIRE) | (temp_grid > AMBIENT_TEMP + TEMP_SETTLED_EPS)
+    rows = np.flatnonzero(active.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(active.any(axis=0))
+    margin = 4
+    return (slice(max(0, rows[0] - margin), min(grid_height, rows[-1] + margin + 1)),
+            slice(max(0, cols[0] - margin), min(grid_width, cols[-1] + margin + 1)))
+
+def _diffuse_box(temp_grid, grid_np, out, box):
+    """Write temp_grid into out with the cells in box (if any) diffused."""
+    out[...] = temp_grid
+    if box is None:
+        return  # settled at ambient: nothing to diffuse
+    if HAVE_NUMBA:
+        _diffuse(temp_grid[box], grid_np[box], out[box])
+    else:
+        _diffuse_numpy(temp_grid[box], grid_np[box], out[box])
+
+def diffuse_temperature(temp_grid, grid, grid_width, grid_height, out=None):
+    """Apply heat diffusion using finite difference method.
+
+    If out is given the new field is written into it (it must not be temp_grid),
+    which lets callers swap between two preallocated buffers each tick. Only the
+    bounding box around fires and warm cells is recomputed (see diffusion_box);
+    the rest is copied.
+    """
+    grid_np = np.asarray(grid, dtype=GRID_DTYPE)
+    if out is None:
+        out = np.empty_like(temp_grid)
+    _diffuse_box(temp_grid, grid_np, out, diffusion_box(temp_grid, grid_np))
+    return out
+
+def _dilate_cross(mask):
+    """Return the cells 4-connected to any cell in mask."""
+    grown = np.zeros_like(mask)
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    grown[1:, :] |= mask[:-1, :]
+    grown[:-1, :] |= mask[1:, :]
+    return grown
+
+def _spread_numpy(grid, spread_fire, spread_smoke):
+    """Vectorised fire then smoke spread, updating grid in place."""
+    if spread_fire:
+        fire_mask = grid == FIRE
+        new_fire = _dilate_cross(fire_mask) & ((grid == EMPTY) | (grid == SMOKE))
+        grid[new_fire] = FIRE
+
+    if spread_smoke:
+        source_mask = (grid == FIRE) | (grid == SMOKE)
+        new_smoke = _dilate_cross(source_mask) & (grid == EMPTY)
+        grid[new_smoke] = SMOKE
+
+@njit(parallel=True, nogil=True, cache=True)
+def _spread_pass(src, dst, new_type):
+    """One synchronous spread step from src into dst.
+
+    new_type == FIRE: EMPTY and SMOKE cells next to fire catch fire.
+    new_type == SMOKE: EMPTY cells next to fire or smoke fill with smoke.
+    """
+    h, w = src.shape
+    for y in prange(h):
+        for x in range(w):
+            cell = src[y, x]
+            dst[y, x] = cell
+            if not (cell == EMPTY or (new_type == FIRE and cell == SMOKE)):
+                continue
+            for dx, dy in NEIGHBORS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < w and 0 <= ny < h:
+                    nb = src[ny, nx]
+                    if nb == FIRE or (new_type == SMOKE and nb == SMOKE):
+                        dst[y, x] = new_type
+                        break
+
+@njit(nogil=True, cache=True)
+def _fire_spread_row(src, y, out):
+    """Row y of the grid after one fire spread from src, written into out."""
+    h, w = src.shape
+    for x in range(w):
+        cell = src[y, x]
+        out[x] = cell
+        if cell == EMPTY or cell == SMOKE:
+            if ((x > 0 and src[y, x - 1] == FIRE) or (x + 1 < w and src[y, x + 1] == FIRE)
+                    or (y > 0 and src[y - 1, x] == FIRE) or (y + 1 < h and src[y + 1, x] == FIRE)):
+                out[x] = FIRE
+
+@njit(parallel=True, nogil=True, cache=True)
+def _spread_fused(src, dst):
+    """Fire spread followed by smoke spread, in a single pass from src into dst.
+
+    Gives the same result as _spread_pass(FIRE) then _spread_pass(SMOKE), but
+    the intermediate grid only ever exists as three rolling rows per block of
+    rows instead of a full grid written out and read back.
+    """
+    h, w = src.shape
+    block = 32
+    for b in prange((h + block - 1) // block):
+        y0 = b * block
+        y1 = min(h, y0 + block)
+        rows = np.empty((3, w), src.dtype)  # post-fire rows y - 1, y and y + 1, indexed by row % 3
+        for y in range(max(0, y0 - 1), min(h, y0 + 2)):
+            _fire_spread_row(src, y, rows[y % 3])
+        for y in range(y0, y1):
+            if y > y0 and y + 1 < h:
+                _fire_spread_row(src, y + 1, rows[(y + 1) % 3])
+            mid = rows[y % 3]
+            up = rows[(y + 2) % 3]
+            down = rows[(y + 1) % 3]
+            for x in range(w):
+                cell = mid[x]
+                dst[y, x] = cell
+                if cell == EMPTY:
+                    if ((x > 0 and (mid[x - 1] == FIRE or mid[x - 1] == SMOKE))
+                            or (x + 1 < w and (mid[x + 1] == FIRE or mid[x + 1] == SMOKE))
+                            or (y > 0 and (up[x] == FIRE or up[x] == SMOKE))
+                            or (y + 1 < h and (down[x] == FIRE or down[x] == SMOKE))):
+                        dst[y, x] = SMOKE
+
+def spread_fire_and_smoke(grid, grid_width, grid_height, tick):
+    """Spread fire and smoke at different speeds.
+
+    grid is updated in place. Each spread reads a snapshot of the grid, and
+    smoke spreads after fire when both are due on the same tick. Returns
+    whether either spread was due, i.e. whether grid may have changed.
+
+    Like compute_distance_map, grid may also be a list of rows; it is spread
+    as a GRID_DTYPE array and the result written back into the list.
+    """
+    spread_fire = tick % FIRE_SPREAD_DELAY == 0
+    spread_smoke = tick % SMOKE_SPREAD_DELAY == 0
+    if not (spread_fire or spread_smoke):
+        return False
+
+    grid_np = np.asarray(grid, dtype=GRID_DTYPE)
+    if not HAVE_NUMBA:
+        _spread_numpy(grid_np, spread_fire, spread_smoke)
+    else:
+        # Double-buffered: each pass reads grid_np and writes scratch, copied back after
+        scratch = np.empty_like(grid_np)
+        if spread_fire and spread_smoke:
+            _spread_fused(grid_np, scratch)
+        else:
+            _spread_pass(grid_np, scratch, FIRE if spread_fire else SMOKE)
+        grid_np[...] = scratch
+    if grid_np is not grid:
+        grid[:] = grid_np.tolist() if isinstance(grid, list) else grid_np
+    return True
+
+
+def make_agent_arrays(capacity):
+    """Allocate structure-of-arrays agent storage with room for capacity agents.
+
+    Every entry is one attribute column indexed by agent slot, and "alive"
+    marks the slots that currently hold an agent. A grid never holds more
+    than one agent per cell, so grid_width * grid_height slots is enough.
+    """
+    return {
+        "x": np.zeros(capacity, dtype=np.int32),
+        "y": np.zeros(capacity, dtype=np.int32),
+        "id": np.zeros(capacity, dtype=np.int32),
+        "speed": np.zeros(capacity, dtype=np.float64),
+        "age": np.zeros(capacity, dtype=np.int32),
+        "panic": np.zeros(capacity, dtype=np.int32),
+        "wait_ticks": np.zeros(capacity, dtype=np.int32),
+        "health": np.zeros(capacity, dtype=np.int8),
+        "fire_exp": np.zeros(capacity, dtype=np.int32),
+        "smoke_exp": np.zeros(capacity, dtype=np.int32),
+        "heat_ticks": np.zeros(capacity, dtype=np.int32),
+        "alive": np.zeros(capacity, dtype=bool),
+    }
+
+def add_agent(agents, n_agents, x, y, agent_id, panic):
+    """Store a new agent in slot n_agents and return the new slot count."""
+    agents["x"][n_agents] = x
+    agents["y"][n_agents] = y
+    agents["id"][n_agents] = agent_id
+    agents["speed"][n_agents] = 1.0
+    agents["age"][n_agents] = 30
+    agents["panic"][n_agents] = panic
+    agents["wait_ticks"][n_agents] = 0
+    agents["health"][n_agents] = HEALTHY
+    agents["fire_exp"][n_agents] = 0
+    agents["smoke_exp"][n_agents] = 0
+    agents["heat_ticks"][n_agents] = 0
+    agents["alive"][n_agents] = True
+    return n_agents + 1
+
+def remove_agent(agents, n_agents, slot):
+    """Remove the agent in slot by moving the last slot into it, and return the new slot count."""
+    last = n_agents - 1
+    for column in agents.values():
+        column[slot] = column[last]
+    agents["alive"][last] = False
+    return last
+
+def compact_agents(agents, n_agents):
+    """Move live agents to the front of every column (keeping their order) and return their count."""
+    live = np.flatnonzero(agents["alive"][:n_agents])
+    for column in agents.values():
+        column[:len(live)] = column[live]
+    agents["alive"][len(live):n_agents] = False
+    return len(live)
+
+def find_agent(agents, n_agents, x, y):
+    """Return the slot of the live agent standing on (x, y), or None."""
+    hits = np.flatnonzero(agents["alive"][:n_agents] & (agents["x"][:n_agents] == x) & (agents["y"][:n_agents] == y))
+    return int(hits[0]) if len(hits) else None
+
+def agent_positions(agents, n_agents):
+    """Return the (x, y) cell of every live agent."""
+    live = np.flatnonzero(agents["alive"][:n_agents])
+    return [(int(agents["x"][i]), int(agents["y"][i])) for i in live]
+
+@njit(nogil=True, cache=True)
+def seed_step_rng(seed):
+    """Seed the random generator step_agents draws from (Numba keeps its own state)."""
+    np.random.seed(seed)
+
+@njit(nogil=True, cache=True)
+def _apply_exposure(exposure, nf_limit, f_limit, inc_limit, start_health, health):
+    """Return the health after one hazard check; INCAPACITATED ends the agent's checks."""
+    if exposure >= inc_limit:
+        return INCAPACITATED
+    if exposure >= f_limit and (start_health == HEALTHY or start_health == INJURED):
+        return FATALLY_INJURED
+    if exposure >= nf_limit and start_health == HEALTHY:
+        return INJURED
+    return health
+
+@njit(nogil=True, cache=True)
+def _move_intents_loop(order, agent_x, agent_y, panic, wait_ticks, incapacitated,
+                       grid, dist_map, occupied, panic_roll, panic_pick):
+    """Stage 1 of step_agents: the flat target cell each agent claims, or -1 to stay."""
+    h, w = grid.shape
+    UNREACHABLE = np.iinfo(dist_map.dtype).max
+    target = np.full(order.shape[0], -1, np.int64)
+    for k in range(order.shape[0]):
+        i = order[k]
+        if incapacitated[i]:
+            continue
+
+        if wait_ticks[i] > 0:
+            wait_ticks[i] -= 1
+            continue
+
+        ax, ay = agent_x[i], agent_y[i]
+        if grid[ay, ax] == EXIT:
+            target[k] = ay * w + ax
+            continue
+
+        cur_dist = dist_map[ay, ax]
+        if cur_dist == UNREACHABLE:
+            continue
+
+        # Off-grid and occupied neighbours read as UNREACHABLE (as walls already
+        # are), so picking the best is a min over four ints and a mask lookup
+        # instead of a compare-and-update branch per neighbour
+        d0 = dist_map[ay, ax + 1] if ax + 1 < w and not occupied[ay, ax + 1] else UNREACHABLE
+        d1 = dist_map[ay, ax - 1] if ax > 0 and not occupied[ay, ax - 1] else UNREACHABLE
+        d2 = dist_map[ay + 1, ax] if ay + 1 < h and not occupied[ay + 1, ax] else UNREACHABLE
+        d3 = dist_map[ay - 1, ax] if ay > 0 and not occupied[ay - 1, ax] else UNREACHABLE
+        valid = (d0 < UNREACHABLE) | ((d1 < UNREACHABLE) << 1) | ((d2 < UNREACHABLE) << 2) | ((d3 < UNREACHABLE) << 3)
+        if valid == 0:
+            continue
+        best_d = min(min(d0, d1), min(d2, d3))
+        best = MASK_LOWEST_BIT[(d0 == best_d) | ((d1 == best_d) << 1) | ((d2 == best_d) << 2) | ((d3 == best_d) << 3)]
+
+        n_cands = MASK_POPCOUNT[valid]
+        direction = -1
+        if n_cands > 1 and panic_roll[k] < panic[i] / 10.0:
+            # Panicking agents take any candidate but the best: one draw over the
+            # others, shifted past the best one's ordinal
+            pick = int(panic_pick[k] * (n_cands - 1))
+            if pick >= MASK_POPCOUNT[valid & ((1 << best) - 1)]:
+                pick += 1
+            direction = MASK_NTH_BIT[valid, pick]
+        elif best_d < cur_dist:
+            direction = best
+        if direction >= 0:
+            dx, dy = NEIGHBORS[direction]
+            target[k] = (ay + dy) * w + ax + dx
+    return target
+
+def _move_intents_numpy(order, agent_x, agent_y, panic, wait_ticks, incapacitated,
+                        grid, dist_map, occupied, panic_roll, panic_pick):
+    """Vectorised _move_intents_loop: gathers all four neighbour distances at once."""
+    h, w = grid.shape
+    UNREACHABLE = np.iinfo(dist_map.dtype).max
+    target = np.full(len(order), -1, np.int64)
+    ax, ay = agent_x[order], agent_y[order]
+
+    waiting = ~incapacitated[order] & (wait_ticks[order] > 0)
+    wait_ticks[order[waiting]] -= 1
+    moving = ~incapacitated[order] & ~waiting
+
+    on_exit = moving & (grid[ay, ax] == EXIT)
+    target[on_exit] = ay[on_exit] * w + ax[on_exit]
+    cur_dist = dist_map[ay, ax]
+    moving &= ~on_exit & (cur_dist != UNREACHABLE)
+
+    # Walls, walled-over exits included, are already UNREACHABLE in the BFS result;
+    # marking occupied cells and a border the same way means the gather below
+    # needs no bounds or wall checks
+    padded = np.full((h + 2, w + 2), UNREACHABLE, dtype=dist_map.dtype)
+    padded[1:-1, 1:-1] = np.where(occupied, UNREACHABLE, dist_map)
+    nx = np.stack([ax + dx for dx, _ in NEIGHBORS], axis=1)
+    ny = np.stack([ay + dy for _, dy in NEIGHBORS], axis=1)
+    neighbour_dist = padded[ny + 1, nx + 1]
+
+    valid = neighbour_dist < UNREACHABLE
+    n_cands = valid.sum(axis=1)
+    best = np.argmin(neighbour_dist, axis=1)
+    rows = np.arange(len(order))
+    best_d = neighbour_dist[rows, best]
+    moving &= n_cands > 0
+
+    # Candidate ordinals let the panic pick skip the best candidate like the loop does
+    ordinal = np.cumsum(valid, axis=1) - 1
+    best_ordinal = ordinal[rows, best]
+    panicking = moving & (n_cands > 1) & (panic_roll < panic[order] / 10.0)
+    pick = (panic_pick * np.maximum(n_cands - 1, 1)).astype(np.int64)
+    pick += pick >= best_ordinal
+    pick_dir = np.argmax(valid & (ordinal == pick[:, None]), axis=1)
+
+    direction = np.where(panicking, pick_dir, best)
+    moves = panicking | (moving & (best_d < cur_dist))
+    target[moves] = (ny[rows, direction] * w + nx[rows, direction])[moves]
+    return target
+
+_move_intents = _move_intents_loop if HAVE_NUMBA else _move_intents_numpy
+
+@njit(nogil=True, cache=True)
+def step_agents(n_agents, agent_x, agent_y, speed, panic, wait_ticks, health,
+                fire_exp, smoke_exp, heat_ticks, alive, grid, temp_grid, dist_map,
+                occupied, heat_nf, heat_f, heat_inc, exit_cap):
+    """Advance every live agent by one tick, updating the agent columns in place.
+
+    Stage 0 applies hazard exposure at the current positions, stage 1 has each
+    agent declare a move, stage 2 gives every contested floor cell to its first
+    claimant in a random permutation of the agents, stage 3 lets the first
+    exit_cap claimants through each exit and stage 4 commits the moves. occupied
+    is a bool scratch grid of the grid's shape.
+
+    Returns (exited, exited_injured, exited_fatally_injured, incapacitated).
+    """
+    h, w = grid.shape
+
+    # Stage 0: hazard exposure & injury determination (at current positions).
+    # The same pass collects the live agents and the cells taken at the start of
+    # the tick. Live agents are visited in slot order, which never changes between
+    # ticks, so a seeded run always plays out the same way.
+    n_live = 0
+    order = np.empty(n_agents, np.int64)
+    occupied[:, :] = False
+    incapacitated = np.zeros(n_agents, np.bool_)
+    for i in range(n_agents):
+        if not alive[i]:
+            continue
+        order[n_live] = i
+        n_live += 1
+        ax, ay = agent_x[i], agent_y[i]
+        occupied[ay, ax] = True
+        cell = grid[ay, ax]
+        temp = temp_grid[ay, ax]
+
+        fire_exp[i] = fire_exp[i] + 1 if cell == FIRE else 0
+        smoke_exp[i] = smoke_exp[i] + 1 if cell == SMOKE else 0
+        heat_ticks[i] = heat_ticks[i] + 1 if temp >= SAFE_TEMP_THRESHOLD else 0
+
+        # Direct flame (FIRE cell only), then smoke, then heat; every check compares
+        # against the health at the start of the tick
+        start_health = health[i]
+        if start_health == INCAPACITATED:
+            continue
+        new_health = start_health
+        if cell == FIRE:
+            nf_limit, f_limit, inc_limit = DIRECT_FLAME_THRESHOLDS
+            new_health = _apply_exposure(fire_exp[i], nf_limit, f_limit, inc_limit, start_health, new_health)
+        if new_health != INCAPACITATED:
+            nf_limit, f_limit, inc_limit = SMOKE_THRESHOLD
+            new_health = _apply_exposure(smoke_exp[i], nf_limit, f_limit, inc_limit, start_health, new_health)
+        if new_health != INCAPACITATED:
+            t = min(HEAT_LUT_MAX_TEMP, max(0, int(temp)))
+            new_health = _apply_exposure(heat_ticks[i], heat_nf[t], heat_f[t], heat_inc[t], start_health, new_health)
+        health[i] = new_health
+        incapacitated[i] = new_health == INCAPACITATED
+    order = order[:n_live]
+
+    # Stage 1: each agent declares an intended move (flat target cell, -1 to stay).
+    # The panic draws are taken for every agent up front so both implementations
+    # of the stage consume the random stream the same way.
+    panic_roll = np.random.random(n_live)
+    panic_pick = np.random.random(n_live)
+    target = _move_intents(order, agent_x, agent_y, panic, wait_ticks, incapacitated,
+                           grid, dist_map, occupied, panic_roll, panic_pick)
+
+    # Stage 2 and 3: claims are taken in one random permutation of the agents,
+    # so the first claimant of a floor cell wins it and the first exit_cap
+    # claimants of an exit leave. Incapacitated agents never claim a cell and
+    # are removed in the same pass.
+    claims = np.zeros(h * w, np.int32)
+    exited = exited_injured = exited_fatal = n_incapacitated = 0
+    for k in np.random.permutation(n_live):
+        i = order[k]
+        if incapacitated[i]:
+            alive[i] = False
+            n_incapacitated += 1
+            continue
+        tgt = target[k]
+        if tgt < 0:
+            continue
+        claims[tgt] += 1
+        ty, tx = tgt // w, tgt % w
+        if grid[ty, tx] == EXIT:
+            if claims[tgt] <= exit_cap:
+                alive[i] = False
+                exited += 1
+                if health[i] == INJURED:
+                    exited_injured += 1
+                elif health[i] == FATALLY_INJURED:
+                    exited_fatal += 1
+        elif claims[tgt] == 1:
+            # Stage 4: commit the winning move
+            agent_x[i] = tx
+            agent_y[i] = ty
+            wait_ticks[i] = max(0, int(np.rint(1.0 / max(0.1, speed[i]))) - 1)
+
+    return exited, exited_injured, exited_fatal, n_incapacitated
+
+def advance_tick(grid, temp_grid, temp_buffer, agents, n_agents, dist_map, occupied, tick):
+    """Run tick number tick of the simulation: spread, diffuse, then move the agents.
+
+    grid and the agent columns are updated in place. The temperature field is
+    double-buffered, so the new (temp_grid, temp_buffer) pair is returned along
+    with the tick's (exited, exited_injured, exited_fatally_injured, incapacitated)
+    and the (rows, cols) slice pair of cells whose type or temperature may have
+    changed: the whole grid on spread ticks, the diffused box otherwise, or None.
+    """
+    grid_height, grid_width = grid.shape
+    spread = spread_fire_and_smoke(grid, grid_width, grid_height, tick)
+    # The old field becomes next tick's output buffer
+    box = diffusion_box(temp_grid, grid)
+    _diffuse_box(temp_grid, grid, temp_buffer, box)
+    temp_grid, temp_buffer = temp_buffer, temp_grid
+    changed = (slice(0, grid_height), slice(0, grid_width)) if spread else box
+    if dist_map is None:
+        return temp_grid, temp_buffer, (0, 0, 0, 0), changed
+
+    counts = step_agents(
+        n_agents, agents["x"], agents["y"], agents["speed"], agents["panic"],
+        agents["wait_ticks"], agents["health"], agents["fire_exp"], agents["smoke_exp"],
+        agents["heat_ticks"], agents["alive"], grid, temp_grid, dist_map, occupied,
+        HEAT_NF_TICKS, HEAT_F_TICKS, HEAT_INC_TICKS, EXIT_CAPACITY_PER_TICK)
+    return temp_grid, temp_buffer, counts, changed
+
+def run_simulation(grid, agent_list, exits, seed=42, max_ticks=10000, panic=5):
+    """Run one evacuation without a display and return its final counts.
+
+    Starts the way loading a layout and pressing SPACE does in main(): grid is
+    copied (the caller's is left alone), fire cells start at FIRE_TEMP and every
+    (x, y) in agent_list becomes an agent with the given panic. Runs until no
+    agent is left inside or max_ticks ticks have passed.
+
+    Returns a dict with the number of ticks run and the counts the HUD shows.
+    """
+    grid = np.array(grid, dtype=GRID_DTYPE)
+    grid_height, grid_width = grid.shape
+    temp_grid = np.full((grid_height, grid_width), AMBIENT_TEMP, dtype=TEMP_DTYPE)
+    temp_grid[grid == FIRE] = FIRE_TEMP
+    occupied = np.empty((grid_height, grid_width), dtype=bool)
+
+    agents = make_agent_arrays(grid_width * grid_height)
+    n_agents = 0
+    for agent_id, (x, y) in enumerate(agent_list, start=1):
+        n_agents = add_agent(agents, n_agents, x, y, agent_id, panic)
+    dist_map = compute_distance_map(exits, grid, grid_width, grid_height)
+
+    temp_buffer = np.empty_like(temp_grid)
+    random.seed(seed)
+    seed_step_rng(seed)
+    totals = [0, 0, 0, 0]
+    tick = 0
+    while tick < max_ticks and agents["alive"][:n_agents].any():
+        tick += 1
+        temp_grid, temp_buffer, counts, _ = advance_tick(grid, temp_grid, temp_buffer, agents, n_agents,
+                                                      dist_map, occupied, tick)
+        totals = [total + count for total, count in zip(totals, counts)]
+
+    exited, injured, fatal, incapacitated = totals
+    return {
+        "ticks": tick,
+        "inside": int(agents["alive"][:n_agents].sum()),
+        "exited": exited,
+        "injured": injured,
+        "fatal": fatal,
+        "casualties": incapacitated,
+    }